@@ -0,0 +1,77 @@
+"""
+Times the columnar answer log: appending synthetic events in batches like
+the progress writer does, then the aggregate queries over all of them.
+
+    python benchmarks/answer_log_bench.py --events 2000000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from teps_recall.answer_log import AnswerLog
+
+DAY = 24 * 60 * 60
+
+
+def fill(log, events, items, users, batch, seed=0):
+    rng = random.Random(seed)
+    words = ['item%d' % i for i in range(items)]
+    names = ['user%d' % i for i in range(users)]
+    now = time.time()
+    for start in range(0, events, batch):
+        log.append([
+            (rng.choice(names), 'vocabulary', rng.choice(words), rng.random() < 0.7,
+             rng.randrange(300, 9000) if rng.random() < 0.95 else None, now - rng.random() * 60 * DAY)
+            for _ in range(min(batch, events - start))
+        ])
+    return now
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - t0) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=1000000)
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--batch', type=int, default=200, help="events per append (the progress writer's batch size)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='teps-answers-') as root:
+        log = AnswerLog(root)
+        t0 = time.perf_counter()
+        now = fill(log, args.events, args.items, args.users, args.batch)
+        append_s = time.perf_counter() - t0
+
+        # A fresh instance, like a restarted server reading the log from disk
+        log = AnswerLog(root)
+        results = {
+            'events': args.events,
+            'append_events_per_s': round(args.events / append_s),
+            'hardest_30d_ms': best_of(args.repeat, lambda: log.hardest_items('vocabulary', since=now - 30 * DAY)),
+            'item_stats_all_ms': best_of(args.repeat, lambda: log.item_stats('vocabulary')),
+            'user_trend_7d_ms': best_of(args.repeat, lambda: log.user_trend('vocabulary', 'user5', since=now - 7 * DAY)),
+        }
+
+    for name, value in results.items():
+        print(f"{name:>22}: {value}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
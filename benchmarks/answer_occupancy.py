@@ -0,0 +1,70 @@
+"""
+Measures how long the Streamlit script thread is held per answer click in
+each feedback mode (TEPS_FEEDBACK_MODE=blocking vs client). The app runs on
+a synthetic data/ tree in a temporary directory, so the answers it records
+never reach the real progress log.
+
+    python benchmarks/answer_occupancy.py --answers 20
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from teps_recall.progress_store import get_progress_store
+from synth import make_data_dir
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'app.py')
+
+
+def measure(mode, answers):
+    os.environ['TEPS_FEEDBACK_MODE'] = mode
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    [b for b in at.button if 'Vocab' in b.label][0].click().run()
+    [b for b in at.button if b.label.startswith("🚀")][0].click().run()
+
+    timings = []
+    while at.session_state.page == 'quiz' and len(timings) < answers:
+        option = [b for b in at.button if b.label.startswith("1. ")][0]
+        t0 = time.perf_counter()
+        option.click().run()
+        timings.append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception)
+    return {
+        'mode': mode,
+        'answers': len(timings),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'p50_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--answers', type=int, default=10, help="answers clicked per mode (capped by the quiz length)")
+    parser.add_argument('--rows', type=int, default=200, help="rows in the synthetic vocabulary deck")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='teps-occupancy-') as root:
+        make_data_dir(root, args.rows, modes=('vocabulary',))
+        os.environ['TEPS_BASE_DIR'] = root
+        results = [measure(mode, args.answers) for mode in ('blocking', 'client')]
+        # the writer thread still holds batches; land them before the directory goes away
+        get_progress_store(os.path.join(root, 'data', '.progress.sqlite3')).close()
+    for r in results:
+        print(f"{r['mode']:>9}: {r['answers']} answers, mean {r['mean_ms']:.1f}ms, "
+              f"p50 {r['p50_ms']:.1f}ms, max {r['max_ms']:.1f}ms per click")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
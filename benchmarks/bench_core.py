@@ -0,0 +1,159 @@
+"""
+Micro-benchmarks for the hot paths: DataLoader.load_* and the quiz
+classes' prepare_quiz, over synthetic decks of 1k to 1M rows.
+
+    python benchmarks/bench_core.py --sizes 1k,10k,100k --save-baseline baseline.json
+    python benchmarks/bench_core.py --sizes 1k,10k,100k --baseline baseline.json --threshold 0.25
+
+Every case is timed (best of --repeat runs) and its peak allocation is
+measured with tracemalloc in a separate run. With --baseline, the run
+fails if any case got slower or bigger than the threshold allows.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from teps_recall.data_loader import DataLoader, DeckCache
+from teps_recall import quiz_manager
+from teps_recall.quiz_manager import VocabularyQuiz, GrammarQuiz, ListeningQuiz
+from synth import make_rows, write_deck
+
+QUIZ_CLASSES = {
+    'vocabulary': VocabularyQuiz,
+    'grammar': GrammarQuiz,
+    'listening': ListeningQuiz,
+}
+
+# name -> (encoding, header, distinct meanings)
+VARIANTS = {
+    'utf8-bom': ('utf-8-sig', True, None),
+    'cp949': ('cp949', True, None),
+    'no-header': ('utf-8-sig', False, None),
+    'dup-meanings': ('utf-8-sig', True, 50),
+}
+
+# Timings below this are too noisy to fail a run on
+MIN_COMPARABLE_MS = 5.0
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    for suffix, mult in (('k', 1000), ('m', 1000000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * mult)
+    return int(text)
+
+
+def measure(fn, repeat):
+    """Returns (best wall time in ms, peak traced bytes)."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - t0) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def bench_case(tmp, mode, rows, variant, questions, repeat):
+    encoding, header, distinct = VARIANTS[variant]
+    path = os.path.join(tmp, f'{mode}-{rows}-{variant}.csv')
+    write_deck(path, mode, make_rows(mode, rows, seed=rows, distinct_meanings=distinct), encoding, header)
+
+    def load():
+        # A fresh cache each time so we time the parse, not a cache hit
+        loader = DataLoader(tmp, cache=DeckCache(), use_compiled=False)
+        return loader.load_deck(mode, path)
+
+    results = {}
+    load_ms, load_peak = measure(load, repeat)
+    results['load'] = {'ms': round(load_ms, 3), 'peak_bytes': load_peak}
+
+    deck = load()
+    quiz_cls = QUIZ_CLASSES[mode]
+    n = min(questions, len(deck))
+
+    def prepare():
+        # Cold, like the first session on a deck: the distractor pool is
+        # cached by deck identity and would otherwise only be built once
+        quiz_manager._pools.clear()
+        quiz = quiz_cls(deck)
+        quiz.prepare_quiz(n)
+        return quiz
+
+    prep_ms, prep_peak = measure(prepare, repeat)
+    results['prepare'] = {'ms': round(prep_ms, 3), 'peak_bytes': prep_peak, 'questions': n}
+    os.remove(path)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of regression messages."""
+    failures = []
+    for key, current in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if old['ms'] >= MIN_COMPARABLE_MS and current['ms'] > old['ms'] * (1 + threshold):
+            failures.append(f"{key}: {old['ms']:.2f}ms -> {current['ms']:.2f}ms")
+        if old['peak_bytes'] and current['peak_bytes'] > old['peak_bytes'] * (1 + threshold):
+            failures.append(f"{key}: peak {old['peak_bytes']} -> {current['peak_bytes']} bytes")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loader and quiz-preparation micro-benchmarks.")
+    parser.add_argument('--sizes', default='1k,10k,100k', help="deck sizes, e.g. 1k,10k,100k,1m")
+    parser.add_argument('--modes', default='vocabulary,grammar,listening')
+    parser.add_argument('--variants', default=','.join(VARIANTS))
+    parser.add_argument('--questions', type=int, default=1000, help="questions prepared per quiz")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save-baseline', help="write the results here as the new baseline")
+    parser.add_argument('--baseline', help="compare against this baseline file")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown/growth, 0.25 = 25%%")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='teps-bench-') as tmp:
+        for mode in args.modes.split(','):
+            for rows in [parse_size(s) for s in args.sizes.split(',')]:
+                for variant in args.variants.split(','):
+                    if mode == 'grammar' and not VARIANTS[variant][1]:
+                        continue # grammar decks are only read by header name
+                    case = bench_case(tmp, mode, rows, variant, args.questions, args.repeat)
+                    for stage, metrics in case.items():
+                        key = f"{mode}/{rows}/{variant}/{stage}"
+                        results[key] = metrics
+                        print(f"{key:<45} {metrics['ms']:>10.2f}ms {metrics['peak_bytes'] / 2**20:>9.2f}MiB peak")
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        failures = compare(results, baseline, args.threshold)
+        if failures:
+            print(f"\n{len(failures)} regression(s) over {args.threshold:.0%}:")
+            for line in failures:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
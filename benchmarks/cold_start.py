@@ -0,0 +1,120 @@
+"""
+Cold-start check: wall time of a fresh CLI launch and of the first Streamlit
+rerun in a fresh interpreter, plus a "python -X importtime" report of the
+modules that cost the most. Exits 1 when either time is over budget. The
+children run on a synthetic data/ tree in a temporary TEPS_BASE_DIR, so the
+catalog and search index they build never touch the real one.
+
+    python benchmarks/cold_start.py --cli-budget-ms 400 --rerun-budget-ms 3000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synth import make_data_dir
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, 'src')
+
+# Run in a child so every sample starts with empty module and deck caches
+FIRST_RERUN = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+t0 = time.perf_counter()
+at.run()
+elapsed = (time.perf_counter() - t0) * 1000
+if at.exception:
+    raise SystemExit(str(at.exception))
+print(elapsed)
+"""
+
+
+def cli_launch(repeat, env):
+    """Whole-process time for `main.py --help` (interpreter start + imports + argparse)."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(SRC, 'main.py'), '--help'],
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def first_rerun(repeat, env):
+    """Time of the first AppTest run of app.py, imports of app.py included."""
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', FIRST_RERUN, os.path.join(SRC, 'app.py')],
+                             env=env, check=True, capture_output=True, text=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def import_report(module, top):
+    """Slowest modules by cumulative import time, as printed by -X importtime."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                         cwd=SRC, check=True, capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative) / 1000, name[1:].rstrip()))
+    # Modules are listed as they finish: keep the target and its children,
+    # not what the interpreter imported at startup (site and friends)
+    end = max(i for i, (ms, name) in enumerate(rows) if name == module)
+    start = max((i for i, (ms, name) in enumerate(rows[:end]) if not name.startswith(' ')), default=-1) + 1
+    total = rows[end][0]
+    rows = sorted(rows[start:end + 1], reverse=True)
+    return round(total, 1), rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cli-budget-ms', type=float, default=400)
+    parser.add_argument('--rerun-budget-ms', type=float, default=3000)
+    parser.add_argument('--module', default='teps_recall.data_loader', help="module for the import report")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--rows', type=int, default=1000, help="rows per synthetic deck")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    total, rows = import_report(args.module, args.top)
+    print(f"import {args.module}: {total} ms")
+    for ms, name in rows:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    with tempfile.TemporaryDirectory(prefix='teps-cold-') as root:
+        make_data_dir(root, args.rows)
+        env = dict(os.environ, TEPS_BASE_DIR=root)
+        cli = cli_launch(args.repeat, env)
+        rerun = first_rerun(args.repeat, env)
+    results = {
+        'import_ms': total,
+        'cli_launch_ms': round(statistics.median(cli), 1),
+        'first_rerun_ms': round(statistics.median(rerun), 1),
+        'cli_budget_ms': args.cli_budget_ms,
+        'rerun_budget_ms': args.rerun_budget_ms,
+    }
+    print(f"CLI launch (median of {args.repeat}): {results['cli_launch_ms']} ms, budget {args.cli_budget_ms:.0f}")
+    print(f"first rerun (median of {args.repeat}): {results['first_rerun_ms']} ms, budget {args.rerun_budget_ms:.0f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    over = (results['cli_launch_ms'] > args.cli_budget_ms or
+            results['first_rerun_ms'] > args.rerun_budget_ms)
+    if over:
+        print("over budget", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
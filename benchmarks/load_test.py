@@ -0,0 +1,213 @@
+"""
+Concurrent-session load test for src/app.py, driven headlessly with
+Streamlit's AppTest. Each simulated student goes home -> setup -> quiz ->
+result -> home against synthetic decks, and every rerun is timed.
+
+    python benchmarks/load_test.py --sessions 1,5,10 --rows 5000 --json load.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from unittest.mock import MagicMock
+
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+from synth import make_data_dir
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'app.py')
+MODE_BUTTONS = {
+    'vocabulary': 'Vocab',
+    'grammar': 'Grammar',
+    'listening': 'Listening',
+    'reading': 'Reading',
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def current_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if platform.system() == 'Darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def allow_concurrent_apptests():
+    """
+    AppTest installs a mock Runtime for the length of each run and resets it
+    to None afterwards, which breaks other sessions running at the same time.
+    Fall back to one shared mock instead, and keep the appTest flag set so
+    the per-run config patch restores it to True rather than False.
+    Each AppTest also recompiles the script on every run, and concurrent
+    ast.parse calls are not thread-safe on some CPython 3.11 releases, so
+    the bytecode is shared like a real server's single ScriptCache.
+    """
+    compiled = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_get_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in compiled:
+                compiled[script_path] = get_bytecode(self, script_path)
+            return compiled[script_path]
+
+    ScriptCache.get_bytecode = shared_get_bytecode
+    fallback = MagicMock(spec=Runtime)
+    fallback.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    Runtime.instance = classmethod(lambda cls: cls._instance or fallback)
+    Runtime.exists = classmethod(lambda cls: True)
+    config.set_option('global.appTest', True)
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, current_rss_bytes())
+
+
+class Session:
+    """One simulated student; records the latency of every rerun."""
+    def __init__(self, mode, questions):
+        self.mode = mode
+        self.questions = questions
+        self.latencies = []
+        self.at = AppTest.from_file(APP, default_timeout=300)
+
+    def _run(self, element=None):
+        t0 = time.perf_counter()
+        (element or self.at).run()
+        self.latencies.append((time.perf_counter() - t0) * 1000)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def _button(self, predicate):
+        return [b for b in self.at.button if predicate(b.label)][0]
+
+    def journey(self):
+        self._run()
+        self._run(self._button(lambda l: MODE_BUTTONS[self.mode] in l).click())
+        slider = self.at.slider[0]
+        self._run(slider.set_value(min(self.questions, slider.max)))
+        self._run(self._button(lambda l: l.startswith("🚀")).click())
+
+        while self.at.session_state.page == 'quiz':
+            if self.mode == 'listening':
+                self._run(self._button(lambda l: l.startswith("👀")).click())
+                self._run(self._button(lambda l: 'Easy' in l).click())
+            else:
+                self._run(self._button(lambda l: l.startswith("1. ") or l.startswith("To-v")).click())
+
+        self._run(self._button(lambda l: 'Return Home' in l).click())
+        return self.latencies
+
+
+def run_level(sessions, modes, questions):
+    sampler = RssSampler()
+    rss_before = current_rss_bytes()
+    sampler.start()
+    errors = []
+    latencies = []
+
+    def one(i):
+        return Session(modes[i % len(modes)], questions).journey()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        for future in [pool.submit(one, i) for i in range(sessions)]:
+            try:
+                latencies.extend(future.result())
+            except Exception as e:
+                errors.append(str(e))
+    wall = time.perf_counter() - t0
+    peak = sampler.stop()
+
+    return {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'errors': len(errors),
+        'error_samples': errors[:3],
+        'wall_s': round(wall, 3),
+        'throughput_reruns_per_s': round(len(latencies) / wall, 2) if wall else None,
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        'peak_rss_mb': round(peak / 2**20, 1),
+        'rss_growth_per_session_mb': round((peak - rss_before) / 2**20 / sessions, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the Streamlit app.")
+    parser.add_argument('--sessions', default='1,5,10', help="comma-separated concurrent session counts")
+    parser.add_argument('--rows', type=int, default=1000, help="rows per synthetic deck")
+    parser.add_argument('--questions', type=int, default=10, help="questions answered per session")
+    parser.add_argument('--modes', default='vocabulary,grammar,listening,reading', help="modes the sessions cycle through")
+    parser.add_argument('--json', help="write the report to this file")
+    args = parser.parse_args()
+
+    allow_concurrent_apptests()
+    modes = args.modes.split(',')
+    levels = [int(n) for n in args.sessions.split(',')]
+
+    with tempfile.TemporaryDirectory(prefix='teps-load-') as root:
+        make_data_dir(root, args.rows, modes)
+        os.environ['TEPS_BASE_DIR'] = root
+        report = {
+            'config': {
+                'rows_per_deck': args.rows,
+                'questions': args.questions,
+                'modes': modes,
+                'python': platform.python_version(),
+            },
+            'levels': [],
+        }
+        for n in levels:
+            result = run_level(n, modes, args.questions)
+            report['levels'].append(result)
+            print(f"{n:>4} sessions: {result['reruns']} reruns, "
+                  f"p50 {result['p50_ms']}ms p95 {result['p95_ms']}ms p99 {result['p99_ms']}ms, "
+                  f"{result['throughput_reruns_per_s']} reruns/s, peak RSS {result['peak_rss_mb']}MB, "
+                  f"{result['errors']} errors")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Bytes the server sends per rerun, and the time to the first render, with the
+stylesheet inlined on every rerun (TEPS_INLINE_CSS=1, the old behaviour)
+versus loaded once per session from src/static/. The app runs on a
+synthetic data/ tree in a temporary directory, leaving the real one alone.
+
+    python benchmarks/page_payload.py --answers 10 --json payload.json
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+from teps_recall.progress_store import get_progress_store
+from synth import make_data_dir
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'app.py')
+EXTERNAL = b'fonts.googleapis.com'
+
+# Serialized size of every ForwardMsg of the last run, as it would go over the websocket
+_last_run = {}
+_run = LocalScriptRunner.run
+
+
+def _measured_run(self, *args, **kwargs):
+    tree = _run(self, *args, **kwargs)
+    payloads = [msg.SerializeToString() for msg in self.forward_msgs()]
+    _last_run['bytes'] = sum(len(p) for p in payloads)
+    _last_run['external'] = any(EXTERNAL in p for p in payloads)
+    return tree
+
+
+LocalScriptRunner.run = _measured_run
+
+
+def measure(inline, answers):
+    os.environ['TEPS_INLINE_CSS'] = '1' if inline else '0'
+    at = AppTest.from_file(APP, default_timeout=60)
+    reruns = []
+
+    def run(element=None):
+        t0 = time.perf_counter()
+        (element or at).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        reruns.append(((time.perf_counter() - t0) * 1000, _last_run['bytes'], _last_run['external']))
+
+    run()
+    run([b for b in at.button if 'Vocab' in b.label][0].click())
+    run([b for b in at.button if b.label.startswith("🚀")][0].click())
+    while at.session_state.page == 'quiz' and len(reruns) < answers + 3:
+        run([b for b in at.button if b.label.startswith("1. ")][0].click())
+
+    first_ms, first_bytes, _ = reruns[0]
+    later = reruns[1:]
+    return {
+        'css': 'inline' if inline else 'static',
+        'reruns': len(reruns),
+        'first_render_ms': round(first_ms, 1),
+        'first_render_bytes': first_bytes,
+        'rerun_bytes_mean': round(statistics.mean(b for _, b, _ in later)),
+        'rerun_ms_mean': round(statistics.mean(ms for ms, _, _ in later), 1),
+        'total_bytes': sum(b for _, b, _ in reruns),
+        'external_font_requests': sum(1 for _, _, ext in reruns if ext),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--answers', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=200, help="rows in the synthetic vocabulary deck")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='teps-payload-') as root:
+        make_data_dir(root, args.rows, modes=('vocabulary',))
+        os.environ['TEPS_BASE_DIR'] = root
+        measure(False, 1) # warm up imports and the deck cache so both runs start equal
+        results = [measure(True, args.answers), measure(False, args.answers)]
+        # the writer thread still holds batches; land them before the directory goes away
+        get_progress_store(os.path.join(root, 'data', '.progress.sqlite3')).close()
+    for result in results:
+        print(json.dumps(result))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Times the cross-deck search index on synthetic decks: the first full build,
+loading it back from disk, re-indexing one changed deck, and query latency
+for English prefixes, Korean syllables, half-typed syllables and initials.
+
+    python benchmarks/search_bench.py --decks 40 --rows 2000 --json search.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from teps_recall import search_index
+from teps_recall.data_loader import DataLoader
+from synth import make_rows, write_deck
+
+MODES = ('vocabulary', 'reading', 'grammar', 'listening')
+
+
+def half_typed(meaning):
+    """First syllable plus the next one without its final consonant: 요약 -> 요야."""
+    second = ord(meaning[1]) - search_index.HANGUL_BASE
+    return meaning[0] + chr(search_index.HANGUL_BASE + second // 28 * 28)
+
+
+QUERIES = {
+    'english_prefix_3': lambda row: row[0].split()[0].lower()[:3],
+    'english_prefix_5': lambda row: row[0].split()[0].lower()[:5],
+    'korean_2': lambda row: row[-1][:2],
+    'korean_half_typed': lambda row: half_typed(row[-1]),
+    'initials_3': lambda row: search_index.initials(row[-1][:3]),
+}
+
+
+def timed_ms(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - t0) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--decks', type=int, default=40, help="decks per mode")
+    parser.add_argument('--rows', type=int, default=2000, help="rows per deck")
+    parser.add_argument('--queries', type=int, default=50, help="queries per kind")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='teps-search-') as root:
+        for mode in MODES:
+            for d in range(args.decks):
+                write_deck(os.path.join(root, 'data', mode, f'synth_{d + 1}.csv'), mode,
+                           make_rows(mode, args.rows, seed=d * len(MODES) + MODES.index(mode)))
+        loader = DataLoader(root)
+        results = {'decks': args.decks * len(MODES), 'rows': args.decks * len(MODES) * args.rows}
+        results['build_ms'], _ = timed_ms(lambda: loader.search('warmup'))
+
+        # A restarted server: the segments come back from data/.search/
+        search_index._indexes.clear()
+        results['load_ms'], index = timed_ms(lambda: search_index.get_search_index(os.path.join(root, 'data')))
+
+        changed = os.path.join(root, 'data', 'vocabulary', 'synth_1.csv')
+        write_deck(changed, 'vocabulary', make_rows('vocabulary', args.rows, seed=999))
+        results['one_deck_update_ms'], _ = timed_ms(lambda: loader.search('warmup'))
+
+        rng = random.Random(0)
+        rows = [s.row(n) for s in index.segments.values() for n in range(len(s))]
+        for name, make_query in QUERIES.items():
+            samples = []
+            for _ in range(args.queries):
+                ms, _ = timed_ms(lambda: loader.search(make_query(rng.choice(rows))))
+                samples.append(ms)
+            samples.sort()
+            results[name + '_p50_ms'] = samples[len(samples) // 2]
+            results[name + '_p95_ms'] = samples[int(len(samples) * 0.95)]
+
+    for name, value in results.items():
+        print(f"{name:>28}: {round(value, 2)}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({k: round(v, 2) for k, v in results.items()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Synthetic decks for the benchmarks, in the same CSV layouts as data/.
+"""
+import csv
+import os
+import random
+
+HANGUL_START = 0xAC00
+HANGUL_COUNT = 11172
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+HEADERS = {
+    'vocabulary': ['word', 'meaning'],
+    'reading': ['word', 'meaning'],
+    'grammar': ['word', 'answer', 'meaning'],
+    'listening': ['sentence', 'meaning'],
+}
+
+
+def hangul(rng, length):
+    return ''.join(chr(HANGUL_START + rng.randrange(HANGUL_COUNT)) for _ in range(length))
+
+
+def english(rng, length):
+    return ''.join(rng.choice(LETTERS) for _ in range(length))
+
+
+def make_rows(mode, n, seed=0, distinct_meanings=None):
+    """
+    n rows for a mode. distinct_meanings caps how many different meanings
+    appear, to model decks where most glosses repeat.
+    """
+    rng = random.Random(seed)
+    meanings = None
+    if distinct_meanings:
+        meanings = [hangul(rng, rng.randint(2, 5)) + '하다' for _ in range(distinct_meanings)]
+
+    rows = []
+    for i in range(n):
+        meaning = rng.choice(meanings) if meanings else hangul(rng, rng.randint(2, 6)) + '하다'
+        if mode == 'grammar':
+            rows.append([f"{english(rng, 6)}{i}", rng.choice(['to', 'ing']), meaning])
+        elif mode == 'listening':
+            sentence = ' '.join(english(rng, rng.randint(2, 8)) for _ in range(6)) + f" {i}"
+            rows.append([sentence.capitalize(), meaning])
+        else:
+            rows.append([f"{english(rng, rng.randint(4, 10))}{i}", meaning])
+    return rows
+
+
+def write_deck(path, mode, rows, encoding='utf-8-sig', header=True):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(HEADERS[mode])
+        writer.writerows(rows)
+    return path
+
+
+def make_data_dir(root, rows_per_deck, modes=('vocabulary', 'grammar', 'listening', 'reading'), decks_per_mode=1):
+    """Fills root/data/<mode>/ with synthetic decks; returns root."""
+    for mode in modes:
+        for d in range(decks_per_mode):
+            path = os.path.join(root, 'data', mode, f'synth_{d + 1}.csv')
+            write_deck(path, mode, make_rows(mode, rows_per_deck, seed=d))
+    return root
@@ -1,14 +1,56 @@
 import streamlit as st
+import streamlit.components.v1 as components
+import hmac
+import json
 import os
-import sys
 import time
+import uuid
+import zlib
+from types import SimpleNamespace
 
-# Add current directory to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from teps_recall.data_loader import DataLoader, deck_cache
+from teps_recall.quiz_manager import VocabularyQuiz, GrammarQuiz, ListeningQuiz
+from teps_recall.srs import SrsScheduler, get_srs_store, GRADE_AGAIN, GRADE_GOOD, GRADE_EASY
+from teps_recall.metrics import metrics, span
 
-from data_loader import DataLoader
-from data_loader import DataLoader
-from quiz_manager import VocabularyQuiz, GrammarQuiz, ListeningQuiz
+# TEPS_BASE_DIR points the app at another data/ tree (used by the load tests)
+BASE_DIR = os.environ.get('TEPS_BASE_DIR') or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 'client': advance at once and animate the feedback in the browser.
+# 'blocking': the old behaviour, hold the script thread 0.5s before advancing.
+FEEDBACK_MODE = os.environ.get('TEPS_FEEDBACK_MODE', 'client')
+# The metrics page is at ?admin=<token> and only exists when this is set
+ADMIN_TOKEN = os.environ.get('TEPS_ADMIN_TOKEN')
+
+
+@st.cache_resource
+def get_services():
+    """Stores, workers and exporters shared by every session; built on the first rerun only."""
+    from teps_recall.answer_log import get_answer_log
+    from teps_recall.metrics import get_rerun_profiler, start_exporters
+    from teps_recall.prefetch import get_prefetcher
+    from teps_recall.progress_store import get_progress_store
+
+    # Answer events, written in the background (TEPS_PROGRESS_BATCH_SIZE / _FLUSH_INTERVAL)
+    progress_log = get_progress_store(os.path.join(BASE_DIR, 'data', '.progress.sqlite3'))
+    # Columnar copy of the same events for aggregate queries (item difficulty)
+    answer_log = get_answer_log(os.path.join(BASE_DIR, 'data', '.answers'))
+    progress_log.add_sink(answer_log.append)
+    # Builds the next quiz in the background (TEPS_PREFETCH_WORKERS, 0 turns it off)
+    prefetcher = get_prefetcher()
+
+    # Instrumentation: spans/histograms, plus gauges read at export time.
+    # The admin page is at ?admin=<TEPS_ADMIN_TOKEN>; see metrics.py for the export switches.
+    metrics.register_gauges('deck_cache', deck_cache.stats)
+    metrics.register_gauges('progress_log', lambda: {'written': progress_log.written, 'dropped': progress_log.dropped})
+    if prefetcher:
+        metrics.register_gauges('prefetch', lambda: {'hits': prefetcher.hits, 'misses': prefetcher.misses})
+    start_exporters()
+    return SimpleNamespace(
+        progress_log=progress_log,
+        answer_log=answer_log,
+        prefetcher=prefetcher,
+        rerun_profiler=get_rerun_profiler(os.path.join(BASE_DIR, 'data', '.profiles')),
+    )
 
 # --- Page Config ---
 st.set_page_config(
@@ -19,117 +61,118 @@ st.set_page_config(
 )
 
 # --- Custom CSS for Mobile & Aesthetics ---
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@400;700&display=swap');
-
-    /* Global Settings */
-    html, body, [class*="css"] {
-        font-family: 'Noto Sans KR', sans-serif;
-    }
-    
-    .stApp {
-        background-color: #FDFBF7; /* Warm Ivory */
-    }
-    
-    /* Headers */
-    h1 {
-        color: #6C5CE7; /* Soft Indigo */
-        font-weight: 700;
-        text-align: center;
-        margin-bottom: 0.5rem;
-    }
-    
-    h3 {
-        color: #B2BEC3;
-    }
-
-    /* Card/Button Style Base */
-    .stButton > button {
-        width: 100%;
-        border-radius: 20px;
-        height: 6rem;
-        font-size: 20px;
-        font-weight: 600;
-        border: none;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-        transition: all 0.2s ease;
-        
-        /* Pastel Blue Default */
-        background-color: #D6E6F2; 
-        color: #2D3436;
-        margin-bottom: 10px;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 8px 15px rgba(162, 155, 254, 0.3);
-        background-color: #A2D2FF; /* Slightly deeper pastel blue on hover */
-        color: white;
-    }
-    
-    /* Question Card */
-    .question-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 24px;
-        box-shadow: 0 10px 25px rgba(223, 230, 233, 0.5);
-        text-align: center;
-        margin-bottom: 25px;
-        border: 2px solid #F0F3F5;
-    }
-    
-    .question-text {
-        font-size: 32px;
-        font-weight: 800;
-        color: #6C5CE7;
-        margin: 15px 0;
-    }
-    
-    /* Progress Bar */
-    .stProgress > div > div > div > div {
-        background: linear-gradient(90deg, #A2D2FF, #FFC8DD); /* Pastel Gradient */
-    }
-    
-    /* Result Cards */
-    .result-card-wrong {
-        background-color: #FFEEEE; /* Pastel Red Bg */
-        border-left: 5px solid #FFAAA5; /* Pastel Red Border */
-        padding: 15px;
-        border-radius: 12px;
-        margin-bottom: 10px;
-        color: #555;
-    }
-    
-    .result-card-correct {
-        background-color: #E8F8F5; /* Pastel Green Bg */
-        border-left: 5px solid #A3E4D7; /* Pastel Green Border */
-        padding: 15px;
-        border-radius: 12px;
-        margin-bottom: 10px;
-        color: #555;
-    }
-
-</style>
-""", unsafe_allow_html=True)
+# The stylesheet lives in src/static/app.css and is served by Streamlit's static
+# file server (.streamlit/config.toml), so the browser caches it and no font
+# is fetched from outside. TEPS_INLINE_CSS=1 restores the old behaviour: the
+# whole stylesheet plus a Google Fonts @import re-sent with every rerun.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# fonts/fonts.css only exists once src/subset_font.py has made the bundled font
+STYLESHEETS = ('app.css', 'fonts/fonts.css')
+INLINE_CSS = os.environ.get('TEPS_INLINE_CSS') == '1'
+GOOGLE_FONTS = "https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@400;700&display=swap"
+
+# Runs in a tiny frame (same origin as the app). The loader it installs lives
+# in the app's own window, so the request outlives the frame, which is dropped
+# on the next rerun. The CSS is fetched rather than <link>ed because older
+# Streamlit releases serve static .css files as text/plain.
+LOAD_STYLESHEET = """
+<script>
+const win = window.parent;
+if (!win.tepsLoadCss) {
+    const script = win.document.createElement('script');
+    script.textContent = `window.tepsLoadCss = (urls) => {
+        let style = document.getElementById('teps-css');
+        if (!style) {
+            style = document.createElement('style');
+            style.id = 'teps-css';
+            document.head.appendChild(style);
+        }
+        const src = urls.join(' ');
+        if (style.dataset.src === src) return;
+        style.dataset.src = src;
+        Promise.all(urls.map(url => fetch(url).then(r => r.text())))
+            .then(parts => { style.textContent = parts.join(' '); });
+    };`;
+    win.document.head.appendChild(script);
+}
+win.tepsLoadCss(%s.map(name => new URL('app/static/' + name + '?v=%s', win.document.baseURI).href));
+</script>
+"""
+
+@st.cache_resource
+def load_css(stamps):
+    """
+    The stylesheets joined and a version tag for cache busting. stamps is
+    ((name, mtime), ...) of the ones present; a new mtime re-reads them.
+    """
+    parts = []
+    for name, _ in stamps:
+        with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+            parts.append(f.read())
+    css = '\n'.join(parts)
+    return css, f"{zlib.crc32(css.encode('utf-8')):08x}"
+
+def stylesheet_stamps():
+    stamps = []
+    for name in STYLESHEETS:
+        try:
+            stamps.append((name, os.path.getmtime(os.path.join(STATIC_DIR, name))))
+        except OSError:
+            pass
+    return tuple(stamps)
+
+def inject_css():
+    stamps = stylesheet_stamps()
+    css, version = load_css(stamps)
+    if INLINE_CSS:
+        st.markdown(f"<style>@import url('{GOOGLE_FONTS}');\n{css}</style>", unsafe_allow_html=True)
+        return
+    # Once per session: the <style> stays in the page after this frame is gone
+    if st.session_state.get('css_version') == version:
+        return
+    st.session_state.css_version = version
+    loader = LOAD_STYLESHEET % (json.dumps([name for name, _ in stamps]), version)
+    if hasattr(st, 'iframe'):
+        st.iframe(loader, height=1) # height must be positive
+    else: # Streamlit releases before st.iframe
+        components.html(loader, height=0)
 
 # --- State Management ---
-if 'page' not in st.session_state:
-    st.session_state.page = 'home'
-if 'quiz_instance' not in st.session_state:
-    st.session_state.quiz_instance = None
-if 'current_idx' not in st.session_state:
-    st.session_state.current_idx = 0
-if 'score' not in st.session_state:
-    st.session_state.score = 0
-if 'wrong_answers' not in st.session_state:
-    st.session_state.wrong_answers = [] # Stores dicts of wrong questions
-if 'mode' not in st.session_state:
-    st.session_state.mode = None
-if 'user_answered' not in st.session_state:
-    st.session_state.user_answered = False
-if 'last_feedback' not in st.session_state:
-    st.session_state.last_feedback = None
+def init_session_state():
+    if 'page' not in st.session_state:
+        st.session_state.page = 'home'
+    if 'quiz_instance' not in st.session_state:
+        st.session_state.quiz_instance = None
+    if 'current_idx' not in st.session_state:
+        st.session_state.current_idx = 0
+    if 'score' not in st.session_state:
+        st.session_state.score = 0
+    if 'wrong_answers' not in st.session_state:
+        st.session_state.wrong_answers = [] # Stores dicts of wrong questions
+    if 'mode' not in st.session_state:
+        st.session_state.mode = None
+    if 'deck_id' not in st.session_state:
+        st.session_state.deck_id = None # what answers are recorded under (DataLoader.deck_id)
+    if 'user_answered' not in st.session_state:
+        st.session_state.user_answered = False
+    if 'last_feedback' not in st.session_state:
+        st.session_state.last_feedback = None
+    if 'pending_feedback' not in st.session_state:
+        st.session_state.pending_feedback = None # (kind, message) shown on the next render
+    if 'srs' not in st.session_state:
+        st.session_state.srs = None # SrsScheduler when spaced-repetition mode is on
+    if 'guest_id' not in st.session_state:
+        st.session_state.guest_id = f"guest-{uuid.uuid4().hex[:8]}"
+    if 'question_shown_at' not in st.session_state:
+        st.session_state.question_shown_at = None # (question index, time.time())
+    if 'selected_decks' not in st.session_state:
+        st.session_state.selected_decks = {} # mode -> deck paths picked on the setup screen
+    if 'deck_touched' not in st.session_state:
+        st.session_state.deck_touched = {} # mode -> True once the user changed the selection
+    if 'deck_filter' not in st.session_state:
+        st.session_state.deck_filter = None
+    if 'deck_page' not in st.session_state:
+        st.session_state.deck_page = 0
 
 # --- Helper Functions ---
 def reset_quiz():
@@ -138,12 +181,101 @@ def reset_quiz():
     st.session_state.wrong_answers = []
     st.session_state.user_answered = False
     st.session_state.last_feedback = None
+    st.session_state.pending_feedback = None
+
+def show_pending_feedback():
+    """Plays the feedback for the previous answer once, on the screen that follows it."""
+    pending = st.session_state.pending_feedback
+    if not pending:
+        return
+    st.session_state.pending_feedback = None
+    kind, message = pending
+    if kind == 'correct':
+        st.balloons()
+    else:
+        st.toast(message, icon="❌")
+    label = "⭕ Correct!" if kind == 'correct' else "❌ Wrong!"
+    # current_idx in the markup makes the element new on every answer, restarting the animation
+    st.markdown(f"""
+    <div class="feedback-flash feedback-{kind}" data-answer="{st.session_state.current_idx}">{label}</div>
+    """, unsafe_allow_html=True)
+
+def record_answer(q, correct, grade):
+    """
+    Queues the answer, and its grade for the spaced-repetition scheduler
+    (if on), on the write-behind progress log; never waits on disk writes.
+    """
+    progress_log = get_services().progress_log
+    srs = st.session_state.srs
+    if srs:
+        progress_log.defer(srs.review, q['key'], grade, time.time())
+
+    shown = st.session_state.question_shown_at
+    latency_ms = None
+    if shown and shown[0] == st.session_state.current_idx:
+        latency_ms = int((time.time() - shown[1]) * 1000)
+    # The name box isn't rendered on the quiz page, so its widget key is gone by now
+    user_id = srs.user_id if srs else st.session_state.guest_id
+    progress_log.record(user_id, st.session_state.deck_id, q['key'], correct, latency_ms)
 
 def go_home():
     st.session_state.page = 'home'
     st.session_state.quiz_instance = None
 
-def start_quiz(loader, file_list, mode, num_q):
+def build_quiz(loader, file_list, mode, num_q, hard_distractors=False, srs_user=None):
+    """
+    Loads the selection and prepares a quiz. Touches no session state, so
+    it can also run on a prefetch worker. Raises ValueError if a vocabulary
+    selection has too few distinct meanings.
+    """
+    # Shared, read-only deck; questions only keep indices into it.
+    # Huge selections are streamed instead: one pass keeps num_q random rows
+    # to ask plus a fixed-size pool of distractor rows.
+    num_items = None
+    if loader.should_stream(file_list):
+        all_data, num_items = loader.sample_decks(mode, file_list, num_q)
+    else:
+        all_data = loader.load_decks(mode, file_list)
+    
+    scheduler = None
+    if srs_user:
+        store = get_srs_store(os.path.join(loader.base_dir, 'data', '.srs.sqlite3'))
+        scheduler = SrsScheduler(store, srs_user, loader.deck_id(mode, file_list))
+
+    if mode == 'vocabulary' or mode == 'reading':
+        similarity = None
+        # Building the similarity index parses the whole deck, which is what streaming avoids
+        if hard_distractors and num_items is None:
+            from teps_recall.similarity_index import SimilarityLookup
+            similarity = SimilarityLookup(loader.get_similarity_index(f) for f in file_list)
+        quiz = VocabularyQuiz(all_data, similarity, scheduler)
+    elif mode == 'grammar':
+        quiz = GrammarQuiz(all_data, scheduler)
+    else:
+        quiz = ListeningQuiz(all_data, scheduler)
+        
+    # Questions are built on demand, so the first one shows up at once even for "all items"
+    with span('quiz.prepare'):
+        quiz.prepare_quiz(num_q, lazy=True, num_items=num_items)
+        # Build the first question too, so the quiz screen only has to render it
+        quiz.get_question(0)
+    return quiz
+
+def quiz_key(loader, file_list, mode, num_q, hard_distractors, srs_user):
+    """What a prefetched quiz was built for; a changed file under data/ makes it stale."""
+    version = loader.watcher.version if loader.watcher else None
+    return (mode, tuple(file_list), num_q, hard_distractors, srs_user, version)
+
+def prefetch_quiz(loader, file_list, mode, num_q, hard_distractors=False, srs_user=None):
+    """Speculatively builds the quiz the setup screen would start right now."""
+    prefetcher = get_services().prefetcher
+    if not prefetcher or not file_list or loader.should_stream(file_list):
+        return
+    key = quiz_key(loader, file_list, mode, num_q, hard_distractors, srs_user)
+    prefetcher.submit(st.session_state.guest_id, key,
+                      lambda: build_quiz(loader, file_list, mode, num_q, hard_distractors, srs_user))
+
+def start_quiz(loader, file_list, mode, num_q, hard_distractors=False, srs_user=None):
     if not file_list:
         st.error("파일을 선택해주세요.")
         return
@@ -152,33 +284,23 @@ def start_quiz(loader, file_list, mode, num_q):
     # Ensure file_list is a list
     if isinstance(file_list, str):
         file_list = [file_list]
-        
-    all_data = []
-    for f in file_list:
-        if mode == 'vocabulary':
-            all_data.extend(loader.load_vocabulary(f))
-        elif mode == 'grammar':
-            all_data.extend(loader.load_grammar(f))
-        elif mode == 'reading':
-            all_data.extend(loader.load_reading(f))
-        else:
-            all_data.extend(loader.load_listening(f))
-    
-    if len(all_data) < 4 and (mode == 'vocabulary' or mode == 'reading'):
-        st.error("데이터가 너무 적습니다 (최소 4개 이상 필요).")
-        return
-    
-    if mode == 'vocabulary' or mode == 'reading':
-        quiz = VocabularyQuiz(all_data)
-    elif mode == 'grammar':
-        quiz = GrammarQuiz(all_data)
-    else:
-        quiz = ListeningQuiz(all_data)
-        
-    quiz.prepare_quiz(num_q)
+
+    quiz = None
+    prefetcher = get_services().prefetcher
+    if prefetcher:
+        key = quiz_key(loader, file_list, mode, num_q, hard_distractors, srs_user)
+        quiz = prefetcher.take(st.session_state.guest_id, key)
+    if quiz is None:
+        try:
+            quiz = build_quiz(loader, file_list, mode, num_q, hard_distractors, srs_user)
+        except ValueError:
+            st.error("데이터가 너무 적습니다 (서로 다른 뜻이 최소 4개 이상 필요).")
+            return
     
     st.session_state.quiz_instance = quiz
     st.session_state.mode = mode
+    st.session_state.deck_id = loader.deck_id(mode, file_list)
+    st.session_state.srs = quiz.scheduler
     reset_quiz()
     # Reset specific listening state
     st.session_state.show_answer = False
@@ -220,54 +342,89 @@ def render_home(loader):
             st.session_state.page = 'setup'
             st.rerun()
 
+    if st.button("🔎 단어 검색 (Search)", use_container_width=True):
+        st.session_state.page = 'search'
+        st.rerun()
+
 def render_setup(loader):
     st.title("⚙️ Quiz Setup")
     
     mode = st.session_state.mode
-    
-    if mode == 'vocabulary':
-        dir_name = 'vocabulary'
-        files = loader.get_vocabulary_files()
-    elif mode == 'grammar':
-        dir_name = 'grammar'
-        files = loader.get_grammar_files()
-    elif mode == 'reading':
-        dir_name = 'reading'
-        files = loader.get_reading_files()
-    else: # listening
-        dir_name = 'listening'
-        files = loader.get_listening_files()
+    listing = loader.get_listing(mode)
         
-    if not files:
-        st.error(f"No files found in data/{dir_name}")
+    if not len(listing):
+        st.error(f"No files found in data/{mode}")
         if st.button("Back"):
             go_home()
             st.rerun()
         return
 
-    # File Selection (Multi-select allowed)
-    file_map = {os.path.basename(f): f for f in files}
-    selected_names = st.multiselect(
-        "Select Test Files", 
-        list(file_map.keys()),
-        default=[list(file_map.keys())[0]]
-    )
-    
-    selected_files = [file_map[name] for name in selected_names]
+    # Filter + paging: only one page of decks is rendered, however many are on disk
+    col_filter, col_tags = st.columns(2)
+    with col_filter:
+        prefix = st.text_input("🔎 폴더/파일 (Filter)", key=f'deck_prefix_{mode}', placeholder="2026/week_1")
+    with col_tags:
+        all_tags = listing.tags()
+        tags = st.multiselect("🏷️ 태그 (Tags)", all_tags, key=f'deck_tags_{mode}') if all_tags else []
+
+    deck_filter = (mode, prefix, tuple(tags))
+    if st.session_state.deck_filter != deck_filter:
+        st.session_state.deck_filter = deck_filter
+        st.session_state.deck_page = 0
+    result = loader.list_decks(mode, prefix, tags, st.session_state.deck_page)
+    st.session_state.deck_page = result['page']
+
+    # Selection survives paging and filtering; defaults to the first deck like before
+    selected = st.session_state.selected_decks.setdefault(mode, [])
+    if not selected and not st.session_state.deck_touched.get(mode):
+        selected.append(listing.paths[listing.keys[0]])
+    selected[:] = [f for f in selected if os.path.exists(f)]
+
+    if not result['files']:
+        st.caption("조건에 맞는 파일이 없습니다. (No matching files)")
+    for key, path in result['files']:
+        rows = loader.count_items(path, mode)
+        checked = st.checkbox(f"{key} · {rows}", value=path in selected, key=f'deck_{path}')
+        if checked != (path in selected):
+            st.session_state.deck_touched[mode] = True
+            if checked:
+                selected.append(path)
+            else:
+                selected.remove(path)
+
+    if result['pages'] > 1:
+        col_prev, col_page, col_next = st.columns([1, 3, 1])
+        with col_prev:
+            if st.button("◀", disabled=result['page'] == 0):
+                st.session_state.deck_page -= 1
+                st.rerun()
+        with col_page:
+            st.caption(f"{result['page'] + 1} / {result['pages']} 페이지 · {result['total']}개 파일")
+        with col_next:
+            if st.button("▶", disabled=result['page'] >= result['pages'] - 1):
+                st.session_state.deck_page += 1
+                st.rerun()
+    st.caption(f"선택된 파일 (Selected): {len(selected)}")
+
+    selected_files = list(selected)
     
     # Calculate max questions
-    total_items = 0
-    for f in selected_files:
-        if mode == 'vocabulary':
-            total_items += len(loader.load_vocabulary(f))
-        elif mode == 'grammar':
-            total_items += len(loader.load_grammar(f))
-        elif mode == 'reading':
-            total_items += len(loader.load_reading(f))
-        else:
-            total_items += len(loader.load_listening(f))
+    # Row counts come from the catalog index, no deck parsing needed
+    total_items = sum(loader.count_items(f, mode) for f in selected_files)
             
     num_q = st.slider("Number of Questions", min_value=1, max_value=total_items if total_items > 0 else 1, value=min(10, total_items))
+
+    hard_distractors = False
+    if mode in ('vocabulary', 'reading'):
+        hard_distractors = st.checkbox("🎯 헷갈리는 오답 (Hard distractors)", value=True)
+
+    srs_user = None
+    if st.checkbox("🔁 복습 모드 (Spaced repetition)", value=False):
+        srs_user = st.text_input("학습자 이름 (Name)", key='srs_user').strip() or None
+        if srs_user is None:
+            st.caption("이름을 입력하면 외운 단어는 나중에, 틀린 단어는 먼저 나옵니다.")
+    
+    prefetch_quiz(loader, selected_files, mode, num_q, hard_distractors, srs_user)
     
     col1, col2 = st.columns([1, 4])
     with col1:
@@ -276,7 +433,42 @@ def render_setup(loader):
             st.rerun()
     with col2:
         if st.button("🚀 Start Quiz!", type="primary", use_container_width=True):
-            start_quiz(loader, selected_files, mode, num_q)
+            start_quiz(loader, selected_files, mode, num_q, hard_distractors, srs_user)
+
+MODE_LABELS = {
+    'vocabulary': "📘 어휘",
+    'reading': "📖 독해",
+    'grammar': "📗 문법",
+    'listening': "🎧 청해",
+}
+
+def render_search(loader):
+    st.title("🔎 단어 검색")
+    query = st.text_input("영어 단어 또는 한글 뜻 (Search)", key='search_query',
+                          placeholder="abs, 요약, ㅇㅇ")
+    modes = st.multiselect("영역 (Modes)", list(MODE_LABELS), format_func=MODE_LABELS.get, key='search_modes')
+
+    if query.strip():
+        t0 = time.perf_counter()
+        # Only the first search after a deck changed has anything to index
+        with st.spinner("색인 중..."):
+            result = loader.search(query, modes or None, limit=50)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        st.caption(f"{result['total']}건 중 {len(result['hits'])}건 · {elapsed_ms:.0f}ms")
+        if result['hits']:
+            st.dataframe([{
+                '영역': MODE_LABELS[hit['mode']],
+                '단어/문장': (hit.get('word') or hit.get('sentence'))
+                            + (f" → {hit['answer']}" if hit.get('answer') else ''),
+                '뜻': hit['meaning'],
+                '파일': hit['file'],
+                # Position among the deck's loaded rows, not a line in the CSV
+                '행 (Row)': hit['row'] + 1,
+            } for hit in result['hits']], use_container_width=True, hide_index=True)
+
+    if st.button("🏠 Return Home"):
+        go_home()
+        st.rerun()
 
 def render_quiz():
     quiz = st.session_state.quiz_instance
@@ -290,6 +482,12 @@ def render_quiz():
 
     q = quiz.get_question(idx)
     total = len(quiz.questions)
+
+    show_pending_feedback()
+
+    shown = st.session_state.question_shown_at
+    if not shown or shown[0] != idx:
+        st.session_state.question_shown_at = (idx, time.time())
     
     # Progress Bar
     progress = (idx / total)
@@ -312,17 +510,26 @@ def render_quiz():
     # Answer Logic
     def handle_answer(option_idx):
         correct = (option_idx == q['correct_index'])
+        record_answer(q, correct, GRADE_GOOD if correct else GRADE_AGAIN)
         if correct:
             st.session_state.score += 1
             st.session_state.last_feedback = "correct"
-            st.balloons()
         else:
             st.session_state.wrong_answers.append(q)
             st.session_state.last_feedback = "wrong"
-            st.toast(f"❌ Wrong! Review: {q['options'][q['correct_index']]}", icon="❌")
-        
+        message = f"❌ Wrong! Review: {q['options'][q['correct_index']]}"
+
+        if FEEDBACK_MODE == 'blocking':
+            if correct:
+                st.balloons()
+            else:
+                st.toast(message, icon="❌")
+            time.sleep(0.5) # Short delay to see click effect
+        else:
+            # Shown by the next render while the browser animates it
+            st.session_state.pending_feedback = (st.session_state.last_feedback, message)
+
         # Move to next
-        time.sleep(0.5) # Short delay to see click effect
         st.session_state.current_idx += 1
         st.rerun()
 
@@ -353,6 +560,7 @@ def render_quiz():
             with c1:
                 if st.button("❌ 몰랐음 (Again)", use_container_width=True):
                     # Treat as wrong
+                    record_answer(q, False, GRADE_AGAIN)
                     st.session_state.wrong_answers.append(q)
                     st.session_state.last_feedback = "wrong"
                     st.session_state.show_answer = False
@@ -361,6 +569,7 @@ def render_quiz():
             with c2:
                 if st.button("⭕ 알았음 (Easy)", use_container_width=True):
                      # Treat as correct
+                    record_answer(q, True, GRADE_EASY)
                     st.session_state.score += 1
                     st.session_state.last_feedback = "correct"
                     st.session_state.show_answer = False
@@ -393,6 +602,7 @@ def render_quiz():
 
 def render_result():
     st.title("🏆 Quiz Finished!")
+    show_pending_feedback()
     
     score = st.session_state.score
     total = len(st.session_state.quiz_instance.questions)
@@ -431,24 +641,18 @@ def render_result():
             </div>
             """, unsafe_allow_html=True)
             
+        # Retry quiz with fresh distractors, built while the user reads the note
+        quiz = st.session_state.quiz_instance
+        retry_key = ('retry', quiz.seed, len(wrong_list))
+        wrong_items = list(wrong_list)
+        prefetcher = get_services().prefetcher
+        if prefetcher:
+            prefetcher.submit(st.session_state.guest_id, retry_key, lambda: quiz.retry(wrong_items))
+
         if st.button("🔄 Retry Wrong Answers Only"):
-            # Create a new quiz with only wrong questions
-            # We need to reconstruct the format Expected by Quiz Classes? 
-            # Actually, we can just reset the quiz instance with these questions.
-            # But the Quiz Class 'data' vs 'questions' structure is different.
-            # Easier way: Just inject these questions directly into a new quiz instance.
-            
-            # Simple hack: Just restart the loop with these specific questions
-            # But QuizManager randomly picks from DATA.
-            # So let's extract the 'data-like' items from the wrong questions.
-            
-            # Reconstruct 'item' from question to pass to prepare_quiz is hard because distractors are lost.
-            # Better specific logic:
-            new_quiz = st.session_state.quiz_instance
-            new_quiz.questions = wrong_list # Just reuse the prepared questions
-            # Shuffle them?
-            import random
-            random.shuffle(new_quiz.questions)
+            new_quiz = prefetcher.take(st.session_state.guest_id, retry_key) if prefetcher else None
+            if new_quiz is None:
+                new_quiz = quiz.retry(wrong_items)
             
             st.session_state.quiz_instance = new_quiz
             reset_quiz()
@@ -462,23 +666,89 @@ def render_result():
         </div>
         """, unsafe_allow_html=True)
 
+    render_item_difficulty()
+
     st.markdown("---")
     if st.button("🏠 Return Home", type="primary"):
         go_home()
         st.rerun()
 
+def render_item_difficulty():
+    """Hardest items of this deck selection over the last 30 days, across all users."""
+    missed = {w['key'] for w in st.session_state.wrong_answers}
+    with span('answer_log.hardest'):
+        hardest = get_services().answer_log.hardest_items(st.session_state.deck_id, limit=10,
+                                                          since=time.time() - 30 * 24 * 60 * 60)
+    if not hardest:
+        return
+    with st.expander("📉 어려운 문제 (Item difficulty, 최근 30일)"):
+        st.dataframe([{
+            '문제': ('❌ ' if s['item'] in missed else '') + s['item'],
+            '정답률': f"{s['accuracy']:.0%}",
+            '응답 시간(초)': None if s['median_latency_ms'] is None else round(s['median_latency_ms'] / 1000, 1),
+            '응답 수': s['answers'],
+        } for s in hardest], use_container_width=True, hide_index=True)
+        st.caption("❌ = 이번 퀴즈에서 틀린 문제")
+
+def render_admin(loader):
+    st.title("📊 Metrics")
+    st.caption(f"Active sessions: {metrics.active_sessions()}")
+
+    st.subheader("Spans")
+    st.dataframe(metrics.snapshot(), use_container_width=True, hide_index=True)
+
+    st.subheader("Caches & counters")
+    values = dict(metrics.gauges())
+    values.update(metrics.counters)
+    st.dataframe([{'name': k, 'value': v} for k, v in sorted(values.items())],
+                 use_container_width=True, hide_index=True)
+    rerun_profiler = get_services().rerun_profiler
+    if rerun_profiler:
+        st.caption(f"Slow rerun profiles (>{rerun_profiler.threshold_ms:.0f}ms): "
+                   f"{rerun_profiler.dumped} in {rerun_profiler.out_dir}, "
+                   f"{rerun_profiler.skipped} overlapping reruns not profiled")
+
+    st.download_button("⬇️ Prometheus", metrics.prometheus(), file_name="teps_metrics.prom", mime="text/plain")
+
+def render_page(loader, page):
+    with span('render.' + page):
+        if page == 'home':
+            render_home(loader)
+        elif page == 'setup':
+            render_setup(loader)
+        elif page == 'quiz':
+            render_quiz()
+        elif page == 'result':
+            render_result()
+        elif page == 'search':
+            render_search(loader)
+
+def is_admin():
+    """True if the URL carries the admin token; always False without TEPS_ADMIN_TOKEN."""
+    given = st.query_params.get('admin')
+    if not ADMIN_TOKEN or not given:
+        return False
+    return hmac.compare_digest(given.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
 def main():
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    loader = DataLoader(base_dir)
-    
-    if st.session_state.page == 'home':
-        render_home(loader)
-    elif st.session_state.page == 'setup':
-        render_setup(loader)
-    elif st.session_state.page == 'quiz':
-        render_quiz()
-    elif st.session_state.page == 'result':
-        render_result()
+    inject_css()
+    init_session_state()
+    get_services()
+    metrics.touch_session(st.session_state.guest_id)
+    if is_admin():
+        render_admin(DataLoader(BASE_DIR, watch=True))
+        return
+
+    page = st.session_state.page
+    metrics.inc('reruns')
+    with span('rerun'):
+        loader = DataLoader(BASE_DIR, watch=True)
+        rerun_profiler = get_services().rerun_profiler
+        if rerun_profiler:
+            with rerun_profiler.profile(page):
+                render_page(loader, page)
+        else:
+            render_page(loader, page)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import time
+
+from teps_recall.data_loader import DataLoader
+from teps_recall.deck_format import compiled_path, load_fresh_deck, write_deck
+from teps_recall.similarity_index import build_similarity_index
+
+# data/<mode> directory -> deck kind (reading decks share the vocabulary layout)
+MODE_KINDS = {
+    'vocabulary': 'vocabulary',
+    'reading': 'vocabulary',
+    'grammar': 'grammar',
+    'listening': 'listening',
+}
+
+
+def compile_file(loader, csv_path, kind, force=False):
+    """Compiles one CSV. Returns the row count, or None if it was up to date."""
+    if not force:
+        existing = load_fresh_deck(csv_path, kind)
+        if existing is not None:
+            existing.close()
+            return None
+    source_stat = os.stat(csv_path)
+    if kind == 'grammar':
+        rows = loader._parse_grammar(csv_path)
+    elif kind == 'listening':
+        rows = loader._parse_listening(csv_path)
+    else:
+        rows = loader._parse_vocabulary(csv_path)
+    write_deck(compiled_path(csv_path), kind, rows, source_stat)
+    return len(rows)
+
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Compile every CSV deck under data/ into a memory-mapped .deck file.")
+    parser.add_argument('--base-dir', default=base_dir, help="project root containing data/")
+    parser.add_argument('--force', action='store_true', help="recompile decks that are already up to date")
+    parser.add_argument('--similar', action='store_true', help="also build the hard-distractor index of vocabulary/reading decks")
+    args = parser.parse_args(argv)
+
+    loader = DataLoader(args.base_dir, use_compiled=False)
+    compiled = skipped = 0
+    for mode, kind in MODE_KINDS.items():
+        for csv_path in sorted(loader.get_files(mode)):
+            t0 = time.perf_counter()
+            rows = compile_file(loader, csv_path, kind, force=args.force)
+            name = os.path.relpath(csv_path, args.base_dir)
+            if rows is None:
+                skipped += 1
+                print(f"  up to date  {name}")
+            else:
+                compiled += 1
+                print(f"  compiled    {name} ({rows} rows, {(time.perf_counter() - t0) * 1000:.1f}ms)")
+            if args.similar and kind == 'vocabulary':
+                t0 = time.perf_counter()
+                build_similarity_index(csv_path, loader._parse_vocabulary(csv_path))
+                print(f"  similar     {name} ({(time.perf_counter() - t0) * 1000:.1f}ms)")
+
+    print(f"\n{compiled} compiled, {skipped} up to date.")
+
+
+if __name__ == "__main__":
+    main()
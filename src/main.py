@@ -1,16 +1,23 @@
+import argparse
+import itertools
+import json
 import sys
 import os
 import random
+import time
 
-# Add current directory to path so imports work if run from inside src
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from teps_recall.data_loader import DataLoader
+from teps_recall.quiz_manager import VocabularyQuiz, GrammarQuiz
 
-from data_loader import DataLoader
-from quiz_manager import VocabularyQuiz, GrammarQuiz
+QUIZ_CLASSES = {
+    'vocabulary': VocabularyQuiz,
+    'reading': VocabularyQuiz,
+    'grammar': GrammarQuiz,
+}
 
 def clear_screen():
-    # Simple clear for cleaner UI
-    os.system('cls' if os.name == 'nt' else 'clear')
+    # ANSI clear + cursor home; no subprocess per menu redraw
+    print("\033[2J\033[H", end="", flush=True)
 
 def select_file_from_list(files, file_type_name):
     if not files:
@@ -29,25 +36,45 @@ def select_file_from_list(files, file_type_name):
                 return files[idx]
         print("Invalid selection. Try again.")
 
+def load_quiz_data(loader, kind, target_file, label):
+    """
+    Asks how many questions to test, then loads the deck. Files over the
+    streaming threshold are sampled in one pass instead of loaded whole.
+    Returns (data, num, num_items), or None if the file has no rows.
+    """
+    total = loader.count_items(target_file, kind)
+    if not total:
+        return None
+
+    print(f"\nLoaded {total} {label}.")
+    try:
+        num = int(input(f"How many questions to test? (Max {total}): "))
+    except ValueError:
+        num = total
+
+    if loader.should_stream([target_file]):
+        data, num_items = loader.sample_decks(kind, [target_file], num)
+        return data, num, num_items
+    return loader.load_deck(kind, target_file), num, None
+
 def run_vocabulary_quiz(loader):
     files = loader.get_vocabulary_files()
     target_file = select_file_from_list(files, "Vocabulary")
     if not target_file:
         return
 
-    data = loader.load_vocabulary(target_file)
-    if len(data) < 4:
-        print("Not enough data to create variety options (need at least 4 words).")
+    loaded = load_quiz_data(loader, 'vocabulary', target_file, "words")
+    if not loaded:
+        print("No valid data found in file.")
         return
-
-    print(f"\nLoaded {len(data)} words.")
+    data, num, num_items = loaded
     try:
-        num = int(input(f"How many questions to test? (Max {len(data)}): "))
+        quiz = VocabularyQuiz(data)
     except ValueError:
-        num = len(data)
-    
-    quiz = VocabularyQuiz(data)
-    quiz.prepare_quiz(num)
+        print("Not enough data to create variety options (need at least 4 distinct meanings).")
+        return
+
+    quiz.prepare_quiz(num, num_items=num_items)
     
     score = 0
     total = len(quiz.questions)
@@ -81,19 +108,14 @@ def run_grammar_quiz(loader):
     if not target_file:
         return
 
-    data = loader.load_grammar(target_file)
-    if not data:
+    loaded = load_quiz_data(loader, 'grammar', target_file, "grammar questions")
+    if not loaded:
         print("No valid data found in file.")
         return
+    data, num, num_items = loaded
 
-    print(f"\nLoaded {len(data)} grammar questions.")
-    try:
-        num = int(input(f"How many questions to test? (Max {len(data)}): "))
-    except ValueError:
-        num = len(data)
-        
     quiz = GrammarQuiz(data)
-    quiz.prepare_quiz(num)
+    quiz.prepare_quiz(num, num_items=num_items)
     
     score = 0
     total = len(quiz.questions)
@@ -124,8 +146,223 @@ def run_grammar_quiz(loader):
     print(f"\n🎉 Quiz Finished! Score: {score}/{total}")
     input("Press Enter to return to menu...")
 
-def main():
+# --- Batch / replay mode ---
+
+def resolve_files(base_dir, files):
+    """Paths as given if they exist, else relative to the project root."""
+    resolved = []
+    for f in files:
+        if not os.path.exists(f) and os.path.exists(os.path.join(base_dir, f)):
+            f = os.path.join(base_dir, f)
+        resolved.append(f)
+    return resolved
+
+def grade(q, answer):
+    """Option index picked for answer (an index or the option text), or None if invalid."""
+    options = q.options
+    if isinstance(answer, bool):
+        return None
+    if isinstance(answer, int):
+        return answer if 0 <= answer < len(options) else None
+    if isinstance(answer, str):
+        try:
+            return list(options).index(answer)
+        except ValueError:
+            return None
+    return None
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def check_session(spec):
+    """Why a session spec can't run (wrong field types), or None."""
+    if not isinstance(spec.get('mode', 'vocabulary'), str):
+        return "mode must be a string"
+    files = spec.get('files') or []
+    if not isinstance(files, list) or not all(isinstance(f, str) for f in files):
+        return "files must be a list of paths"
+    if spec.get('seed') is not None and not _is_int(spec['seed']):
+        return "seed must be an integer"
+    questions = spec.get('questions')
+    if questions is not None and not (_is_int(questions) and questions >= 0):
+        return "questions must be a non-negative integer"
+    if spec.get('answers') is not None and not isinstance(spec['answers'], list):
+        return "answers must be a list"
+    return None
+
+def run_session(loader, spec, details=False):
+    """
+    Runs one scripted session. spec has mode, files, seed, questions and
+    optionally answers (one per question, by index or option text). Without
+    answers the generated questions are returned instead, to check a deck.
+    """
+    mode = spec.get('mode', 'vocabulary')
+    result = {'session': spec.get('session'), 'mode': mode, 'seed': spec.get('seed')}
+    error = check_session(spec)
+    if error is not None:
+        result['error'] = error
+        return result
+    quiz_class = QUIZ_CLASSES.get(mode)
+    if quiz_class is None:
+        result['error'] = f"unsupported mode {mode!r}"
+        return result
+    files = resolve_files(loader.base_dir, spec.get('files') or [])
+    if not files:
+        result['error'] = "no files"
+        return result
+
+    data = loader.load_decks(mode, files)
+    try:
+        quiz = quiz_class(data)
+    except ValueError as e:
+        result['error'] = str(e)
+        return result
+    answers = spec.get('answers')
+    num = spec.get('questions') or (len(answers) if answers is not None else len(data))
+    quiz.prepare_quiz(num, seed=spec.get('seed'), lazy=True)
+    result['seed'] = quiz.seed
+    result['questions'] = len(quiz.questions)
+
+    if answers is None:
+        result['items'] = [{
+            'key': q['key'],
+            'text': q['text'],
+            'options': list(q['options']),
+            'correct_index': q['correct_index'],
+        } for q in quiz.questions]
+        return result
+
+    score = 0
+    wrong = []
+    invalid = 0
+    trace = []
+    for q, answer in zip(quiz.questions, answers):
+        picked = grade(q, answer)
+        correct = picked == q.correct_index
+        if picked is None:
+            invalid += 1
+        if correct:
+            score += 1
+        else:
+            wrong.append(q.key)
+        if details:
+            trace.append({'key': q.key, 'picked': picked, 'correct_index': q.correct_index, 'correct': correct})
+    result['answered'] = min(len(answers), len(quiz.questions))
+    result['score'] = score
+    result['wrong'] = wrong
+    if invalid:
+        result['invalid'] = invalid
+    if details:
+        result['details'] = trace
+    return result
+
+def read_sessions(stream, defaults):
+    """One JSON object per line; missing fields come from the command line."""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            spec = json.loads(line)
+        except ValueError as e:
+            yield {'session': line_no, 'error': f"bad JSON on line {line_no}: {e}"}
+            continue
+        if isinstance(spec, list):
+            spec = {'answers': spec}
+        if not isinstance(spec, dict):
+            yield {'session': line_no, 'error': f"line {line_no} is not a JSON object or list"}
+            continue
+        merged = dict(defaults)
+        merged.update(spec)
+        merged.setdefault('session', line_no)
+        yield merged
+
+_worker_loader = None
+
+def _init_worker(base_dir):
+    global _worker_loader
+    _worker_loader = DataLoader(base_dir)
+
+def _run_chunk(specs, details):
+    # Each worker process keeps its own deck cache across chunks
+    return [spec if 'error' in spec else run_session(_worker_loader, spec, details) for spec in specs]
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_batch(args, base_dir):
+    base_dir = args.base_dir or base_dir
+    loader = DataLoader(base_dir)
+    defaults = {'mode': args.mode, 'files': args.files, 'seed': args.seed, 'questions': args.questions}
+
+    source = None
+    if args.answers is None:
+        sessions = [dict(defaults, session=1)]
+    elif args.answers == '-':
+        sessions = read_sessions(sys.stdin, defaults)
+    else:
+        source = open(args.answers, 'r', encoding='utf-8')
+        sessions = read_sessions(source, defaults)
+
+    if args.jobs > 1:
+        # Sessions are independent; results come back in input order
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(args.jobs, initializer=_init_worker, initargs=(base_dir,))
+        chunks = pool.map(_run_chunk, _chunks(sessions, 256), itertools.repeat(args.details))
+        results = (r for chunk in chunks for r in chunk)
+    else:
+        pool = None
+        results = (spec if 'error' in spec else run_session(loader, spec, args.details) for spec in sessions)
+
+    out = sys.stdout
+    count = errors = 0
+    t0 = time.perf_counter()
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        count += 1
+        errors += 'error' in result
+    if pool is not None:
+        pool.shutdown()
+    elapsed = time.perf_counter() - t0
+    if source is not None:
+        source.close()
+    if args.answers is not None:
+        print(f"{count} sessions, {errors} errors, {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f}/s)",
+              file=sys.stderr)
+    return 1 if errors else 0
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="TEPS Recall quiz. Interactive by default; --batch runs scripted sessions.")
+    parser.add_argument('--batch', action='store_true', help="non-interactive: print one JSON line per session")
+    parser.add_argument('--mode', default='vocabulary', choices=sorted(QUIZ_CLASSES))
+    parser.add_argument('--files', nargs='+', default=[], help="deck CSVs (relative to the project root or cwd)")
+    parser.add_argument('--seed', type=int, help="quiz seed; the same seed gives the same questions and options")
+    parser.add_argument('--questions', type=int, help="questions per session (default: one per answer, or the whole deck)")
+    parser.add_argument('--answers', help="JSON-lines file of sessions ('-' for stdin); without it the questions are printed")
+    parser.add_argument('--details', action='store_true', help="include a per-question trace in each result")
+    parser.add_argument('--jobs', type=int, default=1, help="worker processes for --batch")
+    parser.add_argument('--base-dir', help="project root containing data/")
+    parser.add_argument('--search', metavar='QUERY', help="print ranked hits for a word or Korean gloss across all decks as JSON")
+    parser.add_argument('--limit', type=int, default=20, help="hits returned by --search")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    args = parse_args(argv)
+    if args.search is not None:
+        loader = DataLoader(args.base_dir or base_dir)
+        print(json.dumps(loader.search(args.search, limit=args.limit), ensure_ascii=False))
+        return 0
+    if args.batch:
+        return run_batch(args, base_dir)
+
     # If run from src, base_dir is parent. If run from root, we need to handle that.
     # Current assumption: file is at root/src/main.py. 
     # os.path.dirname(__file__) -> root/src
@@ -154,4 +391,4 @@ def main():
             input("Invalid selection. Press Enter...")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import argparse
+import glob
+import os
+
+from teps_recall.atomic_file import atomic_write
+from teps_recall.csv_codec import decode_bytes
+
+WEIGHTS = (400, 700)
+
+
+def ks_x_1001_hangul():
+    """The 2,350 common Hangul syllables of KS X 1001 (rows 0xB0-0xC8 of EUC-KR)."""
+    chars = []
+    for lead in range(0xB0, 0xC9):
+        for trail in range(0xA1, 0xFF):
+            try:
+                chars.append(bytes([lead, trail]).decode('euc-kr'))
+            except UnicodeDecodeError:
+                pass
+    return chars
+
+
+def collect_text(base_dir):
+    """Every character the app can show: ASCII, common Hangul, the decks and the UI strings."""
+    chars = set(chr(c) for c in range(0x20, 0x7F))
+    chars.update(ks_x_1001_hangul())
+    chars.update(chr(c) for c in range(0x3131, 0x3164)) # compatibility jamo
+    for path in glob.glob(os.path.join(base_dir, 'data', '**', '*.csv'), recursive=True):
+        with open(path, 'rb') as f:
+            text, _ = decode_bytes(f.read(), path)
+        chars.update(text)
+    for path in glob.glob(os.path.join(base_dir, 'src', '*.py')):
+        with open(path, encoding='utf-8') as f:
+            chars.update(f.read())
+    return ''.join(sorted(c for c in chars if c.isprintable()))
+
+
+def subset(font_path, text, out_path):
+    from fontTools import subset as ft_subset
+
+    options = ft_subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    options.desubroutinize = True
+    font = ft_subset.load_font(font_path, options)
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    # The running app serves these files; never let it see a half-written one
+    with atomic_write(out_path, 'wb') as f:
+        ft_subset.save_font(font, f, options)
+
+
+FONT_FACE = """@font-face {
+    font-family: 'TEPS Noto Sans KR';
+    font-style: normal;
+    font-weight: %(weight)d;
+    font-display: swap;
+    src: %(local)s,
+         url('app/static/fonts/%(file)s') format('woff2');
+}
+"""
+LOCAL_NAMES = {
+    400: "local('Noto Sans KR'), local('NotoSansKR-Regular')",
+    700: "local('Noto Sans KR Bold'), local('NotoSansKR-Bold')",
+}
+
+
+def write_font_css(out_dir, files):
+    """fonts.css: the @font-face rules for the subsets; app.py loads it after app.css."""
+    rules = [FONT_FACE % {'weight': weight, 'local': LOCAL_NAMES[weight], 'file': name}
+             for weight, name in files]
+    with atomic_write(os.path.join(out_dir, 'fonts.css'), encoding='utf-8') as f:
+        f.write('/* Written by src/subset_font.py; URLs are relative to the page. */\n')
+        f.write('\n'.join(rules))
+
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(
+        description="Subset Noto Sans KR to the characters the app uses and write the woff2 files it serves.")
+    parser.add_argument('--regular', required=True, help="NotoSansKR-Regular .ttf/.otf")
+    parser.add_argument('--bold', required=True, help="NotoSansKR-Bold .ttf/.otf")
+    parser.add_argument('--base-dir', default=base_dir, help="project root containing data/ and src/")
+    args = parser.parse_args(argv)
+
+    try:
+        import fontTools # noqa: F401
+        import brotli # noqa: F401 (woff2 compression)
+    except ImportError:
+        parser.error("needs fonttools and brotli: pip install fonttools brotli")
+
+    text = collect_text(args.base_dir)
+    out_dir = os.path.join(args.base_dir, 'src', 'static', 'fonts')
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"{len(text)} characters")
+    files = []
+    for weight, font_path in zip(WEIGHTS, (args.regular, args.bold)):
+        name = f"NotoSansKR-{weight}.subset.woff2"
+        out_path = os.path.join(out_dir, name)
+        subset(font_path, text, out_path)
+        files.append((weight, name))
+        print(f"  {weight}  {os.path.relpath(out_path, args.base_dir)} ({os.path.getsize(out_path) / 1024:.0f} KiB)")
+    write_font_css(out_dir, files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+TEPS Recall core: deck loading and quiz engines shared by the Streamlit app
+(app.py), the terminal quiz (main.py), the deck compiler and validator.
+
+Submodules are imported on first use, so ``from teps_recall import DataLoader``
+only pays for the loader and not for numpy (answer log), sqlite (SRS, progress)
+or the metrics exporters. benchmarks/cold_start.py keeps an eye on this.
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'DataLoader': 'data_loader',
+    'DeckCache': 'data_loader',
+    'deck_cache': 'data_loader',
+    'VocabularyQuiz': 'quiz_manager',
+    'GrammarQuiz': 'quiz_manager',
+    'ListeningQuiz': 'quiz_manager',
+    'SimilarityLookup': 'similarity_index',
+    'build_similarity_index': 'similarity_index',
+    'SrsScheduler': 'srs',
+    'get_srs_store': 'srs',
+    'get_progress_store': 'progress_store',
+    'get_answer_log': 'answer_log',
+    'get_prefetcher': 'prefetch',
+    'get_search_index': 'search_index',
+    'validate_file': 'validation',
+    'metrics': 'metrics',
+    'span': 'metrics',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,284 @@
+"""
+Append-only, columnar log of answer events for aggregate queries
+("which items have the worst accuracy this month?").
+
+Layout, per deck under data/.answers/<deck>/:
+    items.jsonl, users.jsonl    one JSON string per line; the line number is the id
+    seg-000000.<column>         fixed-width column files, SEGMENT_ROWS rows each
+
+Columns are appended in lockstep and read back with numpy, so a query is a
+handful of vectorised passes over contiguous arrays. Closed segments never
+change and stay cached in memory; only the open one is re-read.
+"""
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+SEGMENT_ROWS = 1 << 20
+
+COLUMNS = {
+    'ts': np.dtype('<f8'),
+    'item': np.dtype('<u4'),
+    'user': np.dtype('<u4'),
+    'correct': np.dtype('u1'),
+    'latency': np.dtype('<i4'), # -1 if unknown
+}
+
+_UNSAFE = re.compile(r'[^\w.-]+')
+DAY = 24 * 60 * 60
+
+
+class _Dictionary:
+    """String <-> id table backed by an append-only JSON-lines file."""
+    def __init__(self, path):
+        self.path = path
+        self.values = []
+        self.ids = {}
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            raw = b''
+        good = 0
+        for line in raw.splitlines(keepends=True):
+            try:
+                value = json.loads(line) if line.endswith(b'\n') else None
+            except ValueError:
+                value = None
+            if value is None:
+                break # torn last line from a crash
+            self.ids.setdefault(value, len(self.values))
+            self.values.append(value)
+            good += len(line)
+        if good < len(raw):
+            with open(path, 'r+b') as f:
+                f.truncate(good)
+
+    def ids_for(self, values):
+        """Ids of values, appending the unknown ones to the file."""
+        new = []
+        out = []
+        for value in values:
+            i = self.ids.get(value)
+            if i is None:
+                i = self.ids[value] = len(self.values)
+                self.values.append(value)
+                new.append(value)
+            out.append(i)
+        if new:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(v, ensure_ascii=False) + '\n' for v in new))
+        return out
+
+
+class DeckLog:
+    """The columns of one deck, split into segments of SEGMENT_ROWS rows."""
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.items = _Dictionary(os.path.join(path, 'items.jsonl'))
+        self.users = _Dictionary(os.path.join(path, 'users.jsonl'))
+        self.segments = sorted(
+            int(name[4:10]) for name in os.listdir(path)
+            if name.startswith('seg-') and name.endswith('.ts')
+        ) or [0]
+        self._closed = {} # segment number -> {column: array}, immutable
+        self._open_rows = self._repair(self.segments[-1])
+
+    def _file(self, segment, column):
+        return os.path.join(self.path, 'seg-%06d.%s' % (segment, column))
+
+    def _repair(self, segment):
+        """Rows in a segment; a partly written last row (crash) is cut off."""
+        sizes = {}
+        for column in COLUMNS:
+            try:
+                sizes[column] = os.path.getsize(self._file(segment, column))
+            except OSError:
+                sizes[column] = 0
+        rows = min(sizes[c] // dtype.itemsize for c, dtype in COLUMNS.items())
+        for column, dtype in COLUMNS.items():
+            if sizes[column] > rows * dtype.itemsize:
+                with open(self._file(segment, column), 'r+b') as f:
+                    f.truncate(rows * dtype.itemsize)
+        return rows
+
+    def append(self, events):
+        """events: (user, item, correct, latency_ms, ts) tuples."""
+        users = self.users.ids_for(e[0] for e in events)
+        items = self.items.ids_for(e[1] for e in events)
+        columns = {
+            'ts': [e[4] for e in events],
+            'item': items,
+            'user': users,
+            'correct': [1 if e[2] else 0 for e in events],
+            'latency': [-1 if e[3] is None else e[3] for e in events],
+        }
+        start = 0
+        while start < len(events):
+            room = SEGMENT_ROWS - self._open_rows
+            if room == 0:
+                self.segments.append(self.segments[-1] + 1)
+                self._open_rows = 0
+                continue
+            end = min(len(events), start + room)
+            segment = self.segments[-1]
+            for column, dtype in COLUMNS.items():
+                with open(self._file(segment, column), 'ab') as f:
+                    f.write(np.asarray(columns[column][start:end], dtype=dtype).tobytes())
+            self._open_rows += end - start
+            start = end
+
+    def _read(self, segment, rows=None):
+        out = {}
+        for column, dtype in COLUMNS.items():
+            try:
+                out[column] = np.fromfile(self._file(segment, column), dtype=dtype, count=-1 if rows is None else rows)
+            except (OSError, ValueError):
+                out[column] = np.empty(0, dtype=dtype)
+        n = min(len(a) for a in out.values())
+        return {c: a[:n] for c, a in out.items()}
+
+    def columns(self):
+        """Every column of the deck as one array each."""
+        parts = []
+        for segment in self.segments[:-1]:
+            cached = self._closed.get(segment)
+            if cached is None:
+                cached = self._closed[segment] = self._read(segment)
+            parts.append(cached)
+        parts.append(self._read(self.segments[-1], self._open_rows))
+        if len(parts) == 1:
+            return parts[0]
+        return {c: np.concatenate([p[c] for p in parts]) for c in COLUMNS}
+
+
+class AnswerLog:
+    """
+    Per-deck columnar answer logs under one directory. append() is meant to
+    be fed by ProgressStore's writer thread (see add_sink); the queries can
+    run from any thread.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._decks = {}
+        self._lock = threading.RLock()
+
+    def _deck(self, deck, create=False):
+        key = _UNSAFE.sub('_', deck) or '_'
+        log = self._decks.get(key)
+        if log is None:
+            path = os.path.join(self.path, key)
+            if not create and not os.path.isdir(path):
+                return None
+            log = self._decks[key] = DeckLog(path)
+        return log
+
+    def append(self, batch):
+        """batch: ProgressStore events, (user_id, deck, item, correct, latency_ms, ts)."""
+        by_deck = {}
+        for user_id, deck, item, correct, latency_ms, ts in batch:
+            by_deck.setdefault(deck, []).append((user_id, item, correct, latency_ms, ts))
+        with self._lock:
+            for deck, events in by_deck.items():
+                self._deck(deck, create=True).append(events)
+
+    def _select(self, deck, since, until, user):
+        with self._lock:
+            log = self._deck(deck)
+            if log is None:
+                return None, None
+            cols = log.columns()
+            items = log.items.values
+            user_id = log.users.ids.get(user) if user is not None else None
+        if user is not None and user_id is None:
+            return None, None
+        mask = np.ones(len(cols['ts']), dtype=bool)
+        if since is not None:
+            mask &= cols['ts'] >= since
+        if until is not None:
+            mask &= cols['ts'] < until
+        if user_id is not None:
+            mask &= cols['user'] == user_id
+        if not mask.all():
+            cols = {c: a[mask] for c, a in cols.items()}
+        return cols, items
+
+    def item_stats(self, deck, since=None, until=None, user=None, min_answers=1):
+        """
+        Per-item answers, accuracy and median latency (ms, None if no
+        latencies were recorded) over a time window, optionally for one user.
+        """
+        cols, items = self._select(deck, since, until, user)
+        if cols is None or not len(cols['ts']):
+            return []
+        n_items = len(items)
+        answers = np.bincount(cols['item'], minlength=n_items)
+        correct = np.bincount(cols['item'], weights=cols['correct'], minlength=n_items)
+        medians = _group_medians(cols['item'], cols['latency'], n_items)
+
+        stats = []
+        for i in np.nonzero(answers >= max(min_answers, 1))[0]:
+            stats.append({
+                'item': items[i],
+                'answers': int(answers[i]),
+                'accuracy': float(correct[i] / answers[i]),
+                'median_latency_ms': None if np.isnan(medians[i]) else float(medians[i]),
+            })
+        return stats
+
+    def hardest_items(self, deck, limit=10, since=None, until=None, min_answers=3):
+        """Lowest accuracy first; slower median answers break ties."""
+        stats = self.item_stats(deck, since, until, min_answers=min_answers)
+        stats.sort(key=lambda s: (s['accuracy'], -(s['median_latency_ms'] or 0)))
+        return stats[:limit]
+
+    def user_trend(self, deck, user, since=None, until=None, bucket=DAY):
+        """A user's answers and accuracy per time bucket (default: per day), oldest first."""
+        cols, _ = self._select(deck, since, until, user)
+        if cols is None or not len(cols['ts']):
+            return []
+        buckets = (cols['ts'] // bucket).astype(np.int64)
+        keys, inverse, counts = np.unique(buckets, return_inverse=True, return_counts=True)
+        correct = np.bincount(inverse, weights=cols['correct'])
+        return [{
+            'start': float(k * bucket),
+            'answers': int(n),
+            'accuracy': float(c / n),
+        } for k, n, c in zip(keys, counts, correct)]
+
+
+def _group_medians(groups, values, n_groups):
+    """Median of values per group id, ignoring negative (missing) values; NaN for empty groups."""
+    keep = values >= 0
+    groups = groups[keep]
+    values = values[keep]
+    medians = np.full(n_groups, np.nan)
+    if not len(values):
+        return medians
+    # One int64 sort on (group, value) packed together beats a lexsort
+    packed = np.sort((groups.astype(np.int64) << 32) | values.astype(np.int64))
+    values = (packed & 0xFFFFFFFF).astype(np.float64)
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    lo = starts[present] + (counts[present] - 1) // 2
+    hi = starts[present] + counts[present] // 2
+    medians[present] = (values[lo] + values[hi]) / 2
+    return medians
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_answer_log(path):
+    """Process-wide AnswerLog for path."""
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = AnswerLog(path)
+        return log
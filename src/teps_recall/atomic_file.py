@@ -0,0 +1,36 @@
+"""
+Atomic file replacement for the sidecars, indexes and reports written next
+to the decks. Every write gets its own temporary file, so two threads (or
+processes) building the same sidecar never interleave into one file, and a
+reader only ever sees a complete old or new version.
+"""
+import contextlib
+import os
+import tempfile
+
+# mkstemp creates files as 0600; the files it replaces were world-readable
+NEW_FILE_MODE = 0o644
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w', **kwargs):
+    """
+    Opens a fresh temporary file next to path (open() mode and kwargs) and
+    moves it over path when the block exits without an error. On an error
+    the temporary file is removed and path is left as it was.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory or '.')
+    try:
+        try:
+            file_mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            file_mode = NEW_FILE_MODE
+        os.chmod(tmp_path, file_mode)
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
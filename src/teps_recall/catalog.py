@@ -0,0 +1,213 @@
+import bisect
+import hashlib
+import json
+import os
+import threading
+
+from .atomic_file import atomic_write
+from .csv_codec import SNIFF_BYTES, sniff_encoding
+
+CATALOG_VERSION = 1
+CATALOG_FILE = '.catalog.json'
+HASH_CHUNK = 1 << 20
+
+# Columns used when a deck has no header row
+DEFAULT_COLUMNS = {
+    'vocabulary': ['word', 'meaning'],
+    'reading': ['word', 'meaning'],
+    'grammar': ['word', 'answer', 'meaning'],
+    'listening': ['sentence', 'meaning'],
+}
+
+
+class CatalogIndex:
+    """
+    Persistent per-deck metadata (row count, encoding, content hash, columns)
+    stored in data/.catalog.json. An entry is only rebuilt when the source
+    file's mtime or size changed, so the setup screen can bound its slider
+    without parsing any deck.
+    """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, CATALOG_FILE)
+        self.entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        if raw.get('version') == CATALOG_VERSION:
+            self.entries = raw.get('decks', {})
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {'version': CATALOG_VERSION, 'decks': self.entries}
+            try:
+                with atomic_write(self.path, encoding='utf-8') as f:
+                    json.dump(payload, f, ensure_ascii=False, indent=1, sort_keys=True)
+                self._dirty = False
+            except OSError:
+                # Read-only data dir: keep the in-memory index only
+                pass
+
+    def _key(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.data_dir).replace(os.sep, '/')
+
+    def get(self, file_path, kind, loader):
+        """
+        Returns the metadata entry for file_path, rebuilding it through
+        loader if the file changed since it was indexed.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        key = self._key(file_path)
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if (entry is not None and entry['kind'] == kind
+                    and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size):
+                return entry
+
+        new_entry = self._build(file_path, kind, st, entry, loader)
+        with self._lock:
+            self.entries[key] = new_entry
+            self._dirty = True
+        self.save()
+        return new_entry
+
+    def _build(self, file_path, kind, st, old_entry, loader):
+        # Hash in chunks and keep only the prefix the sniffers need, so a
+        # large deck isn't held in memory just to index it
+        with open(file_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            h = hashlib.sha1(head)
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                h.update(chunk)
+        sha1 = h.hexdigest()
+
+        # Touched but unchanged: keep the counts, refresh the stat fields
+        if old_entry is not None and old_entry['kind'] == kind and old_entry['sha1'] == sha1:
+            entry = dict(old_entry)
+            entry['mtime_ns'] = st.st_mtime_ns
+            entry['size'] = st.st_size
+            return entry
+
+        encoding = sniff_encoding(head)
+        return {
+            'kind': kind,
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'sha1': sha1,
+            'encoding': encoding,
+            'columns': _header_columns(head, encoding, kind),
+            'rows': loader.count_rows(kind, file_path),
+        }
+
+    def forget(self, file_path):
+        """
+        Drops the entry for file_path if the file is gone. Written out with
+        the next save, so deleting a whole folder doesn't rewrite the index
+        once per file.
+        """
+        if os.path.exists(file_path):
+            return
+        with self._lock:
+            if self.entries.pop(self._key(file_path), None) is not None:
+                self._dirty = True
+
+    def prune(self):
+        """Drops entries whose source file no longer exists."""
+        with self._lock:
+            for key in list(self.entries):
+                if not os.path.exists(os.path.join(self.data_dir, key)):
+                    del self.entries[key]
+                    self._dirty = True
+        self.save()
+
+
+def _header_columns(raw, encoding, kind):
+    """Column names from the header row, or the mode's default layout."""
+    first_line = raw[:4096].decode(encoding, errors='replace').splitlines()[:1]
+    cells = [c.strip().lower() for c in first_line[0].split(',')] if first_line else []
+    if cells and cells[0] in ('word', 'term', 'sentence'):
+        return cells
+    return list(DEFAULT_COLUMNS.get(kind, []))
+
+
+class DeckListing:
+    """
+    Sorted, filterable listing of one mode's decks, including nested
+    folders (data/vocabulary/2026/week_12/test_1.csv). Every folder between
+    the mode directory and the file is a tag ('2026', 'week_12'). Built once
+    per change to data/; filtering by prefix is a binary search, and by tag
+    touches only the decks carrying those tags.
+    """
+    def __init__(self, mode_dir, paths):
+        self.paths = {}
+        for path in paths:
+            key = os.path.relpath(path, mode_dir).replace(os.sep, '/')
+            self.paths[key] = path
+        self.keys = sorted(self.paths, key=str.lower)
+        self._folded = [k.lower() for k in self.keys]
+        self.by_tag = {}
+        for key in self.keys:
+            for tag in key.split('/')[:-1]:
+                self.by_tag.setdefault(tag, []).append(key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def tags(self):
+        return sorted(self.by_tag, key=str.lower)
+
+    def filter(self, prefix='', tags=()):
+        """Keys starting with prefix (case-insensitive) and carrying every tag, in order."""
+        prefix = prefix.strip().lower()
+        lo = bisect.bisect_left(self._folded, prefix)
+        hi = bisect.bisect_left(self._folded, prefix + '\uffff') if prefix else len(self.keys)
+        if not tags:
+            return self.keys[lo:hi]
+
+        tagged = sorted((self.by_tag.get(t, []) for t in tags), key=len)
+        wanted = set(tagged[0]).intersection(*tagged[1:])
+        return [k for k in tagged[0] if k in wanted and k.lower().startswith(prefix)]
+
+    def page(self, prefix='', tags=(), page=0, page_size=20):
+        """
+        One page of the filtered listing: {'files': [(key, path), ...],
+        'total', 'page', 'pages'}. Out-of-range pages are clamped.
+        """
+        keys = self.filter(prefix, tags)
+        pages = max(1, -(-len(keys) // page_size))
+        page = min(max(page, 0), pages - 1)
+        chunk = keys[page * page_size:(page + 1) * page_size]
+        return {
+            'files': [(k, self.paths[k]) for k in chunk],
+            'total': len(keys),
+            'page': page,
+            'pages': pages,
+        }
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(data_dir):
+    """Process-wide CatalogIndex for data_dir (one per directory)."""
+    data_dir = os.path.abspath(data_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(data_dir)
+        if catalog is None:
+            catalog = CatalogIndex(data_dir)
+            _catalogs[data_dir] = catalog
+        return catalog
@@ -0,0 +1,53 @@
+import codecs
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only this much of a file is looked at to pick its codec
+SNIFF_BYTES = 64 * 1024
+
+# cp949 is a superset of euc-kr, so it covers legacy Korean exports too
+FALLBACK_ENCODINGS = ['utf-8-sig', 'cp949']
+
+
+def sniff_encoding(raw, limit=SNIFF_BYTES):
+    """
+    Picks a codec from a bounded prefix of the file's bytes.
+    A UTF-8 BOM wins outright; otherwise the prefix must be valid UTF-8
+    (a multi-byte character cut at the limit is fine) or we assume cp949.
+    """
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    prefix = raw[:limit]
+    try:
+        prefix.decode('utf-8')
+    except UnicodeDecodeError as e:
+        truncated = len(prefix) == limit and e.start >= limit - 3 and e.reason == 'unexpected end of data'
+        if not truncated:
+            return 'cp949'
+    return 'utf-8-sig'
+
+
+def decode_bytes(raw, file_path=''):
+    """
+    Decodes raw in one pass with the sniffed codec. Only if that fails
+    further in than the sniffed prefix is the other codec tried; as a last
+    resort undecodable bytes are replaced and a warning is logged.
+    Returns (text, encoding).
+    """
+    encoding = sniff_encoding(raw)
+    try:
+        return raw.decode(encoding), encoding
+    except UnicodeDecodeError as e:
+        logger.info("%s: %s failed at byte %d past the sniffed prefix", file_path, encoding, e.start)
+
+    for fallback in FALLBACK_ENCODINGS:
+        if fallback == encoding:
+            continue
+        try:
+            return raw.decode(fallback), fallback
+        except UnicodeDecodeError:
+            continue
+
+    logger.warning("%s: no codec decodes cleanly, replacing bad bytes", file_path)
+    return raw.decode(encoding, errors='replace'), encoding
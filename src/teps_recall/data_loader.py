@@ -0,0 +1,515 @@
+import csv
+import glob
+import hashlib
+import io
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from .catalog import DeckListing, get_catalog
+from .csv_codec import FALLBACK_ENCODINGS, SNIFF_BYTES, decode_bytes, sniff_encoding
+from .deck_format import load_fresh_deck
+from .metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Per-file codec and timings of the last parse, keyed by absolute path
+load_reports = {}
+
+# Selections bigger than this are sampled while streaming instead of loaded whole
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('TEPS_STREAMING_THRESHOLD_MB', 50)) * 1024 * 1024
+# Rows kept aside as the distractor pool when sampling a streamed deck
+STREAMING_POOL_ROWS = 2000
+# Decks per page on the setup screen
+DECK_PAGE_SIZE = 20
+
+class Reservoir:
+    """
+    Uniform sample of up to k items from a stream of unknown length, in
+    one pass and O(k) memory (Algorithm R).
+    """
+    def __init__(self, k, rng=random):
+        self.k = k
+        self.rng = rng
+        self.items = []
+        self.seen = 0
+
+    def offer(self, item):
+        if len(self.items) < self.k:
+            self.items.append(item)
+        else:
+            j = self.rng.randrange(self.seen + 1)
+            if j < self.k:
+                self.items[j] = item
+        self.seen += 1
+
+
+def reservoir_sample(iterable, k, rng=random):
+    reservoir = Reservoir(k, rng)
+    for item in iterable:
+        reservoir.offer(item)
+    return reservoir.items
+
+
+def _vocabulary_rows(lines):
+    """Yields {'word', 'meaning'} dicts; also used for reading decks."""
+    for row in csv.reader(lines):
+        if len(row) >= 2:
+            word = row[0].strip()
+            meaning = row[1].strip()
+            # Skip header if present (common headers)
+            if word.lower() in ['word', 'term'] and meaning.lower() in ['meaning', 'definition', 'answer']:
+                continue
+            if word and meaning:
+                yield {'word': word, 'meaning': meaning}
+
+
+def _grammar_rows(lines):
+    """Yields {'word', 'answer', 'meaning'} dicts; needs a header row."""
+    for row in csv.DictReader(lines):
+        if 'word' in row and 'answer' in row:
+            yield {
+                'word': (row.get('word') or '').strip(),
+                'answer': (row.get('answer') or '').strip(),
+                'meaning': (row.get('meaning') or '').strip()
+            }
+
+
+def _listening_rows(lines):
+    """Yields {'sentence', 'meaning'} dicts."""
+    for row in csv.reader(lines):
+        if len(row) >= 2:
+            sentence = row[0].strip()
+            meaning = row[1].strip()
+            # Skip header if present
+            if sentence.lower() == 'sentence' and meaning.lower() == 'meaning':
+                continue
+            if sentence and meaning:
+                yield {'sentence': sentence, 'meaning': meaning}
+
+
+ROW_PARSERS = {
+    'vocabulary': _vocabulary_rows,
+    'reading': _vocabulary_rows,
+    'grammar': _grammar_rows,
+    'listening': _listening_rows,
+}
+
+
+def _estimate_size(deck):
+    """
+    Rough memory footprint of a cached entry: a parsed deck (tuple of flat
+    str dicts), or anything with a memory_size() method (compiled decks,
+    similarity indexes).
+    """
+    memory_size = getattr(deck, 'memory_size', None)
+    if memory_size is not None:
+        return memory_size()
+    size = sys.getsizeof(deck)
+    if not isinstance(deck, tuple):
+        return size
+    for row in deck:
+        size += sys.getsizeof(row)
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+
+class DeckCache:
+    """
+    Process-wide cache of parsed decks, shared by every Streamlit session.
+    Entries are keyed by (kind, path, mtime, size), so an edited CSV is
+    re-parsed automatically. Least recently used decks are evicted once the
+    estimated memory use goes over max_bytes.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (deck, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, kind, file_path, parse):
+        """
+        Returns the cached deck for file_path, calling parse(file_path) on a miss.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return ()
+        path = os.path.abspath(file_path)
+        key = (kind, path, st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Parse outside the lock so one slow file doesn't block other sessions
+        deck = parse(file_path)
+        if isinstance(deck, list):
+            deck = tuple(deck)
+        size = _estimate_size(deck)
+
+        with self._lock:
+            # Drop older versions of the same file
+            for old in [k for k in self._entries if k[0] == kind and k[1] == path]:
+                self._bytes -= self._entries.pop(old)[1]
+            self._entries[key] = (deck, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+        return deck
+
+    def invalidate(self, file_path=None):
+        """Drops every cached version of file_path (or everything if None)."""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            path = os.path.abspath(file_path)
+            for old in [k for k in self._entries if k[1] == path]:
+                self._bytes -= self._entries.pop(old)[1]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Shared by every DataLoader in the process (i.e. every Streamlit session)
+deck_cache = DeckCache()
+
+
+_listings = {} # (mode dir) -> (watcher version, DeckListing)
+_listings_lock = threading.Lock()
+
+
+class DataLoader:
+    def __init__(self, base_dir, cache=None, use_compiled=True, watch=False):
+        self.base_dir = base_dir
+        self.cache = cache if cache is not None else deck_cache
+        self.use_compiled = use_compiled
+        # With watch=True file listings come from a shared data/ watcher
+        # instead of a glob per call, and changed files leave the cache at once
+        self.watcher = None
+        if watch:
+            # Imported here: the watcher pulls in ctypes, and CLI tools never watch
+            from .data_watcher import get_data_watcher
+            self.watcher = get_data_watcher(os.path.join(base_dir, 'data'))
+        if self.watcher is not None:
+            self.watcher.subscribe(self.cache.invalidate)
+            self.watcher.subscribe(get_catalog(os.path.join(base_dir, 'data')).forget)
+
+    @timed('loader.get_files')
+    def get_files(self, mode):
+        """Every CSV under data/<mode>, nested folders included."""
+        if self.watcher is not None:
+            return self.watcher.files(mode)
+        path = os.path.join(self.base_dir, 'data', mode, '**', '*.csv')
+        return sorted(glob.glob(path, recursive=True))
+
+    @timed('loader.get_listing')
+    def get_listing(self, mode):
+        """
+        DeckListing of a mode. With a watcher it is rebuilt only when data/
+        changed, so paging through thousands of decks costs no directory scan.
+        """
+        mode_dir = os.path.join(self.base_dir, 'data', mode)
+        if self.watcher is None:
+            return DeckListing(mode_dir, self.get_files(mode))
+        version = self.watcher.version
+        with _listings_lock:
+            cached = _listings.get(mode_dir)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        listing = DeckListing(mode_dir, self.get_files(mode))
+        with _listings_lock:
+            _listings[mode_dir] = (version, listing)
+        return listing
+
+    def list_decks(self, mode, prefix='', tags=(), page=0, page_size=DECK_PAGE_SIZE):
+        """One page of a mode's decks, filtered by path prefix and folder tags."""
+        return self.get_listing(mode).page(prefix, tags, page, page_size)
+
+    def get_vocabulary_files(self):
+        return self.get_files('vocabulary')
+
+    def get_grammar_files(self):
+        return self.get_files('grammar')
+
+    def get_listening_files(self):
+        return self.get_files('listening')
+
+    def get_reading_files(self):
+        return self.get_files('reading')
+
+    @timed('loader.load_deck')
+    def load_deck(self, kind, file_path):
+        """Dispatches to the load_* method for a quiz mode."""
+        if kind == 'grammar':
+            return self.load_grammar(file_path)
+        if kind == 'listening':
+            return self.load_listening(file_path)
+        if kind == 'reading':
+            return self.load_reading(file_path)
+        return self.load_vocabulary(file_path)
+
+    @timed('loader.load_decks')
+    def load_decks(self, kind, file_paths):
+        """
+        One shared deck for a selection of files. Several files are merged
+        with duplicate headwords removed (see merged_deck.py); the same
+        selection of unchanged files always gives back the same object, so
+        indexes built per deck are reused across sessions.
+        """
+        if len(file_paths) == 1:
+            return self.load_deck(kind, file_paths[0])
+        from .merged_deck import merge_decks
+        versions = {}
+        for f in file_paths:
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue
+            versions[os.path.abspath(f)] = (st.st_mtime_ns, st.st_size)
+        return merge_decks(kind, versions, lambda path: self.load_deck(kind, path))
+
+    def deck_id(self, kind, file_paths):
+        """
+        Name that answers and review schedules for a selection are kept
+        under: the deck's path under data/ for a single file, a hash of the
+        sorted paths for several. Unlike selection_key it leaves mtimes out,
+        so editing a deck keeps its history.
+        """
+        data_dir = os.path.abspath(os.path.join(self.base_dir, 'data'))
+        paths = sorted({os.path.relpath(os.path.abspath(f), data_dir).replace(os.sep, '/') for f in file_paths})
+        if len(paths) == 1:
+            return paths[0]
+        return '%s/selection-%s' % (kind, hashlib.sha1('\0'.join(paths).encode('utf-8')).hexdigest()[:16])
+
+    def iter_rows(self, kind, file_path):
+        """
+        Streams a deck's rows as dicts without holding the file in memory.
+        The codec is sniffed from the first block; if a later block turns
+        out not to decode, the stream reopens with the other codec and
+        skips the rows it already yielded.
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                encoding = sniff_encoding(f.read(SNIFF_BYTES))
+        except OSError as e:
+            logger.warning("Could not read %s: %s", file_path, e)
+            return
+        parse_rows = ROW_PARSERS[kind]
+        codecs_to_try = [encoding] + [e for e in FALLBACK_ENCODINGS if e != encoding]
+
+        yielded = 0
+        for enc in codecs_to_try:
+            try:
+                with open(file_path, 'r', encoding=enc, newline='') as f:
+                    for n, row in enumerate(parse_rows(f)):
+                        if n >= yielded:
+                            yielded += 1
+                            yield row
+                return
+            except UnicodeDecodeError:
+                logger.info("%s: %s failed after %d rows while streaming", file_path, enc, yielded)
+            except csv.Error as e:
+                logger.warning("%s: CSV error after %d rows: %s", file_path, yielded, e)
+                return
+
+    @timed('loader.count_rows')
+    def count_rows(self, kind, file_path):
+        """Row count, streaming big files instead of loading them."""
+        if self.should_stream([file_path]):
+            return sum(1 for _ in self.iter_rows(kind, file_path))
+        return len(self.load_deck(kind, file_path))
+
+    def should_stream(self, file_paths, threshold=None):
+        """True if the selection is big enough that loading it whole is worse than one streaming pass."""
+        threshold = STREAMING_THRESHOLD_BYTES if threshold is None else threshold
+        total = 0
+        for f in file_paths:
+            try:
+                total += os.path.getsize(f)
+            except OSError:
+                pass
+        return total > threshold
+
+    @timed('loader.sample_decks')
+    def sample_decks(self, kind, file_paths, num_items, pool_rows=STREAMING_POOL_ROWS, rng=random):
+        """
+        One pass over the selected files, keeping a uniform sample of
+        num_items rows to ask plus a separate reservoir of pool_rows rows
+        whose meanings serve as distractors. Returns (deck, num_items):
+        the first num_items rows of deck are the questions.
+        """
+        items = Reservoir(num_items, rng)
+        pool = Reservoir(pool_rows, rng)
+        for f in file_paths:
+            for row in self.iter_rows(kind, f):
+                items.offer(row)
+                pool.offer(row)
+        return tuple(items.items + pool.items), len(items.items)
+
+    @timed('loader.get_deck_info')
+    def get_deck_info(self, file_path, kind):
+        """
+        Catalog metadata for a deck: rows, encoding, sha1, columns.
+        Only parses the file if it changed since it was last indexed.
+        """
+        catalog = get_catalog(os.path.join(self.base_dir, 'data'))
+        return catalog.get(file_path, kind, self)
+
+    def count_items(self, file_path, kind):
+        info = self.get_deck_info(file_path, kind)
+        return info['rows'] if info else 0
+
+    @timed('loader.search')
+    def search(self, query, modes=None, limit=20):
+        """
+        Ranked word/gloss hits across every deck (see search_index.py).
+        Decks changed since the last search are re-indexed first; with a
+        watcher that check is skipped until data/ changes.
+        """
+        from .search_index import FIELDS, get_search_index
+
+        index = get_search_index(os.path.join(self.base_dir, 'data'))
+        version = self.watcher.version if self.watcher is not None else None
+        if version is None or index.version != version:
+            index.update({mode: self.get_files(mode) for mode in FIELDS}, self)
+            index.version = version
+        return index.search(query, modes, limit)
+
+    @timed('loader.get_similarity_index')
+    def get_similarity_index(self, file_path):
+        """
+        Hard-distractor index for a vocabulary/reading deck, kept next to
+        the CSV and updated incrementally when the deck changes.
+        """
+        from .similarity_index import build_similarity_index
+
+        def build(path):
+            return build_similarity_index(path, self.load_vocabulary(path))
+        return self.cache.get('similar', file_path, build)
+
+    def load_vocabulary(self, file_path):
+        """
+        Cached wrapper around _parse_vocabulary (or its compiled .deck). The
+        returned deck is shared between sessions and must not be mutated.
+        """
+        return self._load_cached('vocabulary', file_path, self._parse_vocabulary)
+
+    def _parse_vocabulary(self, file_path):
+        """
+        Loads vocabulary data from a CSV file.
+        Expected format: word, meaning
+        Returns: strict list of dicts [{'word': '...', 'meaning': '...'}]
+        """
+        return self._parse_file(file_path, _vocabulary_rows)
+
+    def load_grammar(self, file_path):
+        """
+        Cached wrapper around _parse_grammar (or its compiled .deck). The
+        returned deck is shared between sessions and must not be mutated.
+        """
+        return self._load_cached('grammar', file_path, self._parse_grammar)
+
+    def _parse_grammar(self, file_path):
+        """
+        Loads grammar data from a CSV file.
+        Expected format: word, answer, meaning
+        Returns: list of dicts [{'word': '...', 'answer': '...', 'meaning': '...'}]
+        """
+        return self._parse_file(file_path, _grammar_rows)
+
+    def load_listening(self, file_path):
+        """
+        Cached wrapper around _parse_listening (or its compiled .deck). The
+        returned deck is shared between sessions and must not be mutated.
+        """
+        return self._load_cached('listening', file_path, self._parse_listening)
+
+    def _parse_listening(self, file_path):
+        """
+        Loads listening data from a CSV file.
+        Expected format: sentence, meaning
+        Returns: strict list of dicts [{'sentence': '...', 'meaning': '...'}]
+        """
+        return self._parse_file(file_path, _listening_rows)
+
+    def _load_cached(self, kind, file_path, parse):
+        """
+        Goes through the shared cache; on a miss a compiled .deck built from
+        the current CSV is memory-mapped instead of parsing the CSV.
+        """
+        def load(path):
+            if self.use_compiled:
+                deck = load_fresh_deck(path, kind)
+                if deck is not None:
+                    return deck
+            return parse(path)
+        return self.cache.get(kind, file_path, load)
+
+    @timed('loader.parse')
+    def _parse_file(self, file_path, rows_fn):
+        """
+        Reads the file once, decodes it with the sniffed codec and parses it
+        in a single pass. Timings and the chosen codec end up in load_reports.
+        """
+        t0 = time.perf_counter()
+        try:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+        except OSError as e:
+            logger.warning("Could not read %s: %s", file_path, e)
+            return []
+        t1 = time.perf_counter()
+        text, encoding = decode_bytes(raw, file_path)
+        t2 = time.perf_counter()
+
+        data = []
+        try:
+            for item in rows_fn(io.StringIO(text, newline='')):
+                data.append(item)
+        except csv.Error as e:
+            logger.warning("%s: CSV error after %d rows: %s", file_path, len(data), e)
+        t3 = time.perf_counter()
+
+        report = {
+            'encoding': encoding,
+            'bytes': len(raw),
+            'rows': len(data),
+            'read_ms': (t1 - t0) * 1000,
+            'decode_ms': (t2 - t1) * 1000,
+            'parse_ms': (t3 - t2) * 1000,
+        }
+        load_reports[os.path.abspath(file_path)] = report
+        logger.info("Loaded %s: %d rows, %s, read %.1fms decode %.1fms parse %.1fms",
+                    file_path, len(data), encoding,
+                    report['read_ms'], report['decode_ms'], report['parse_ms'])
+        return data
+
+    def load_reading(self, file_path):
+        """
+        Loads reading data (same format as vocabulary).
+        """
+        return self.load_vocabulary(file_path)
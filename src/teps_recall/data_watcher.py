@@ -0,0 +1,257 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 2.0 # seconds
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT = struct.Struct('iIII') # wd, mask, cookie, len; followed by the name
+
+
+def scan(data_dir):
+    """{path: (mtime_ns, size)} of every CSV under data_dir."""
+    found = {}
+    for root, dirs, names in os.walk(data_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for name in names:
+            if not name.endswith('.csv'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            found[path] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+class DataWatcher:
+    """
+    Keeps an in-memory listing of the CSVs under data/ current, so the
+    setup screen doesn't glob the directory on every rerun. Changes come
+    from inotify on Linux and from a background rescan every poll_interval
+    seconds elsewhere (or if inotify is unavailable). Subscribers are
+    called with the path of every CSV that was changed, added or removed.
+    """
+    def __init__(self, data_dir, mode='auto', poll_interval=DEFAULT_POLL_INTERVAL):
+        self.data_dir = data_dir
+        self.poll_interval = poll_interval
+        self.version = 0 # bumped on every change to the listing
+        self._files = scan(data_dir)
+        self._by_mode = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._inotify = None
+        if mode == 'auto' and sys.platform.startswith('linux'):
+            self._inotify = _Inotify.open()
+        self.backend = 'inotify' if self._inotify else 'poll'
+        if self._inotify:
+            self._wds = {}
+            self._watch_tree(data_dir)
+            target = self._run_inotify
+        else:
+            target = self._run_poll
+        self._thread = threading.Thread(target=target, name='data-watcher', daemon=True)
+        self._thread.start()
+
+    def subscribe(self, callback):
+        """callback(path) runs on the watcher thread for each changed CSV."""
+        with self._lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def files(self, mode):
+        """CSV paths under data/<mode>, including nested folders, sorted."""
+        with self._lock:
+            if self._by_mode is None:
+                by_mode = {}
+                for path in self._files:
+                    parts = os.path.relpath(path, self.data_dir).split(os.sep)
+                    if len(parts) > 1:
+                        by_mode.setdefault(parts[0], []).append(path)
+                for paths in by_mode.values():
+                    paths.sort()
+                self._by_mode = by_mode
+            return list(self._by_mode.get(mode, ()))
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        if self._inotify:
+            self._inotify.close()
+
+    def _apply(self, found, paths=None):
+        """
+        Merges a fresh scan into the listing. With paths, only those paths
+        (or everything under them, for directories) are compared.
+        """
+        with self._lock:
+            if paths is None:
+                old = self._files
+            else:
+                old = {p: v for p, v in self._files.items() if _under(p, paths)}
+            removed = [p for p in old if p not in found]
+            changed = [p for p in found if old.get(p) != found[p]] + removed
+            if not changed:
+                return
+            for p in removed:
+                del self._files[p]
+            self._files.update(found)
+            self._by_mode = None
+            self.version += 1
+            listeners = list(self._listeners)
+        for path in changed:
+            for callback in listeners:
+                try:
+                    callback(path)
+                except Exception:
+                    logger.exception("Data watcher callback failed for %s", path)
+
+    def _refresh(self, path):
+        """Re-stats one CSV, or rescans a directory subtree."""
+        if os.path.isdir(path):
+            self._apply(scan(path), [path])
+            return
+        try:
+            st = os.stat(path)
+            found = {path: (st.st_mtime_ns, st.st_size)}
+        except OSError:
+            found = {}
+        self._apply(found, [path])
+
+    def _run_poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self._apply(scan(self.data_dir))
+
+    def _watch_tree(self, top):
+        for root, dirs, _ in os.walk(top):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            wd = self._inotify.add_watch(root, WATCH_MASK)
+            if wd >= 0:
+                self._wds[wd] = root
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            events = self._inotify.read(timeout=0.5)
+            if events is None:
+                continue
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    self._apply(scan(self.data_dir))
+                    continue
+                if mask & IN_IGNORED:
+                    self._wds.pop(wd, None)
+                    continue
+                root = self._wds.get(wd)
+                if root is None:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF) and not name:
+                    self._refresh(root)
+                    continue
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._watch_tree(path)
+                    self._refresh(path)
+                elif name.endswith('.csv'):
+                    self._refresh(path)
+
+
+def _under(path, tops):
+    return any(path == t or path.startswith(t + os.sep) for t in tops)
+
+
+class _Inotify:
+    """Minimal inotify(7) binding through libc, so no extra dependency is needed."""
+    def __init__(self, libc, fd):
+        self._libc = libc
+        self.fd = fd
+
+    @classmethod
+    def open(cls):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            logger.info("inotify unavailable (errno %d), polling data/ instead", ctypes.get_errno())
+            return None
+        return cls(libc, fd)
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            logger.info("Can't watch %s (errno %d)", path, ctypes.get_errno())
+        return wd
+
+    def read(self, timeout):
+        """Pending (wd, mask, name) events, or None if none arrived within timeout."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return None
+        events = []
+        pos = 0
+        while pos + EVENT.size <= len(buf):
+            wd, mask, _, length = EVENT.unpack_from(buf, pos)
+            pos += EVENT.size
+            name = os.fsdecode(buf[pos:pos + length].rstrip(b'\0'))
+            pos += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_data_watcher(data_dir):
+    """
+    Process-wide DataWatcher for data_dir, or None if TEPS_DATA_WATCH=off.
+    TEPS_DATA_WATCH=poll forces the polling backend, which rescans every
+    TEPS_DATA_WATCH_INTERVAL seconds.
+    """
+    mode = os.environ.get('TEPS_DATA_WATCH', 'auto')
+    if mode == 'off':
+        return None
+    data_dir = os.path.abspath(data_dir)
+    with _watchers_lock:
+        watcher = _watchers.get(data_dir)
+        if watcher is None:
+            interval = float(os.environ.get('TEPS_DATA_WATCH_INTERVAL', DEFAULT_POLL_INTERVAL))
+            watcher = DataWatcher(data_dir, mode, interval)
+            _watchers[data_dir] = watcher
+        return watcher
@@ -0,0 +1,149 @@
+"""
+Compiled deck format (.deck), written next to the source CSV.
+
+Layout (little endian):
+    header   8s magic, u32 rows, u32 fields, u32 meta length
+    meta     JSON (kind, field names, source size/mtime), padded to 8 bytes
+    offsets  u64[rows * fields + 1], start of each cell in the string table
+    strings  UTF-8 cell values, back to back
+
+The file is memory-mapped read-only and cells are decoded on access, so
+several worker processes share the same page-cache pages instead of each
+holding its own list of dicts.
+"""
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+from .atomic_file import atomic_write
+
+MAGIC = b'TEPSDK01'
+HEADER = struct.Struct('<8sIII')
+OFFSET = struct.Struct('<Q')
+
+FIELDS = {
+    'vocabulary': ('word', 'meaning'),
+    'grammar': ('word', 'answer', 'meaning'),
+    'listening': ('sentence', 'meaning'),
+}
+
+
+def compiled_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.deck'
+
+
+def _pad8(n):
+    return (8 - n % 8) % 8
+
+
+def write_deck(path, kind, rows, source_stat=None):
+    """Writes rows (dicts with the kind's fields) as a compiled deck."""
+    fields = FIELDS[kind]
+    meta = {'kind': kind, 'fields': list(fields)}
+    if source_stat is not None:
+        meta['source_size'] = source_stat.st_size
+        meta['source_mtime_ns'] = source_stat.st_mtime_ns
+    meta_raw = json.dumps(meta).encode('utf-8')
+    meta_raw += b' ' * _pad8(HEADER.size + len(meta_raw))
+
+    offsets = [0]
+    strings = []
+    pos = 0
+    for row in rows:
+        for field in fields:
+            cell = row.get(field, '').encode('utf-8')
+            strings.append(cell)
+            pos += len(cell)
+            offsets.append(pos)
+
+    with atomic_write(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(rows), len(fields), len(meta_raw)))
+        f.write(meta_raw)
+        f.write(struct.pack('<%dQ' % len(offsets), *offsets))
+        f.write(b''.join(strings))
+
+
+class CompiledDeck(Sequence):
+    """
+    Read-only, lazily decoded view over a .deck file.
+    Indexing returns a fresh dict for that row, like the CSV loaders do.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._rows, self._nfields, meta_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError("%s is not a compiled deck" % path)
+        self.meta = json.loads(bytes(self._mm[HEADER.size:HEADER.size + meta_len]))
+        self.kind = self.meta['kind']
+        self.fields = tuple(self.meta['fields'])
+
+        offsets_start = HEADER.size + meta_len
+        offsets_len = (self._rows * self._nfields + 1) * OFFSET.size
+        self._offsets = memoryview(self._mm)[offsets_start:offsets_start + offsets_len].cast('Q')
+        self._strings = offsets_start + offsets_len
+
+    def is_fresh(self, source_stat):
+        """True if the deck was compiled from a CSV with this size and mtime."""
+        return (self.meta.get('source_size') == source_stat.st_size
+                and self.meta.get('source_mtime_ns') == source_stat.st_mtime_ns)
+
+    def __len__(self):
+        return self._rows
+
+    def _cell(self, i):
+        start = self._strings + self._offsets[i]
+        end = self._strings + self._offsets[i + 1]
+        return self._mm[start:end].decode('utf-8')
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._rows))]
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError("deck index out of range")
+        base = index * self._nfields
+        return {field: self._cell(base + j) for j, field in enumerate(self.fields)}
+
+    def memory_size(self):
+        """
+        The mapped file size: the pages are shared with other processes and
+        the page cache, but every row read makes them resident here too.
+        """
+        return len(self._mm)
+
+    def __reduce__(self):
+        # Worker processes re-map the file instead of copying the rows
+        return (CompiledDeck, (self.path,))
+
+    def close(self):
+        self._offsets.release()
+        self._mm.close()
+
+
+def load_fresh_deck(csv_path, kind):
+    """
+    Returns the CompiledDeck for csv_path if one exists and was built from
+    the CSV as it is now, else None.
+    """
+    deck_path = compiled_path(csv_path)
+    try:
+        csv_stat = os.stat(csv_path)
+        deck_stat = os.stat(deck_path)
+    except OSError:
+        return None
+    if deck_stat.st_mtime_ns < csv_stat.st_mtime_ns:
+        return None
+    try:
+        deck = CompiledDeck(deck_path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if deck.kind != kind or not deck.is_fresh(csv_stat):
+        deck.close()
+        return None
+    return deck
@@ -0,0 +1,137 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from .quiz_manager import DistractorPool
+
+# Cached merges; a new selection starts from the longest cached prefix of it
+MAX_MERGED_DECKS = 32
+
+# Field that identifies a row, per deck kind
+KEY_FIELDS = {
+    'vocabulary': 'word',
+    'reading': 'word',
+    'grammar': 'word',
+    'listening': 'sentence',
+}
+
+_SPACES = re.compile(r'\s+')
+_EDGE_PUNCT = '.,;:!?"\'()[]'
+
+
+def normalize_headword(text):
+    """'  Take  Off. ' and 'take off' are the same entry."""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return _SPACES.sub(' ', text).strip().strip(_EDGE_PUNCT).strip()
+
+
+def selection_key(kind, versions):
+    """Hash of a selection: its kind plus every (path, mtime, size)."""
+    h = hashlib.sha1(kind.encode('utf-8'))
+    for path, version in sorted(versions.items()):
+        h.update(('\0%s\0%d\0%d' % (path, version[0], version[1])).encode('utf-8'))
+    return h.hexdigest()
+
+
+class MergedDeck(Sequence):
+    """
+    Read-only union of several decks with duplicates removed: a row whose
+    normalised headword was already seen in an earlier file is skipped, so
+    a word is asked at most once and never becomes its own distractor.
+    Files are added in sorted path order (see merge_decks), so row order and
+    which duplicate is kept depend only on the selection.
+    Rows stay in their source decks; the merge only keeps a (deck, row)
+    reference per entry plus the combined distractor pool.
+    """
+    def __init__(self, kind, base=None):
+        self.kind = kind
+        self.key_field = KEY_FIELDS.get(kind, 'word')
+        if base is None:
+            self.decks = []
+            self.versions = {} # path -> (mtime_ns, size) of the merged files
+            self._deck_of = array('I')
+            self._row_of = array('I')
+            self._seen = set()
+            self.distractor_pool = DistractorPool()
+        else:
+            # Start from a merge of the first files in path order and add the rest
+            self.decks = list(base.decks)
+            self.versions = dict(base.versions)
+            self._deck_of = array('I', base._deck_of)
+            self._row_of = array('I', base._row_of)
+            self._seen = set(base._seen)
+            self.distractor_pool = base.distractor_pool.copy()
+        self.duplicates = 0 if base is None else base.duplicates
+
+    def add(self, path, version, deck):
+        """Appends the rows of deck whose headword isn't in the merge yet."""
+        d = len(self.decks)
+        self.decks.append(deck)
+        self.versions[path] = version
+        key_field = self.key_field
+        for i, row in enumerate(deck):
+            key = normalize_headword(row[key_field])
+            if key in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen.add(key)
+            self._deck_of.append(d)
+            self._row_of.append(i)
+            self.distractor_pool.add(row['meaning'])
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("deck index out of range")
+        return self.decks[self._deck_of[index]][self._row_of[index]]
+
+
+_merged = OrderedDict() # selection_key -> MergedDeck
+_merged_lock = threading.Lock()
+
+
+def merge_decks(kind, versions, load):
+    """
+    Merged deck for a selection. versions maps each path to its current
+    (mtime_ns, size) and load(path) returns its deck. Files are merged in
+    sorted path order, so a selection gives the same deck whatever was merged
+    before it (seeded quizzes depend on that). A selection seen before comes
+    back from the cache; otherwise merging starts from the longest cached
+    merge of a prefix of that order.
+    """
+    key = selection_key(kind, versions)
+    order = sorted(versions)
+    with _merged_lock:
+        merged = _merged.get(key)
+        if merged is not None:
+            _merged.move_to_end(key)
+            return merged
+        base = None
+        for candidate in _merged.values():
+            n = len(candidate.versions)
+            if (candidate.kind == kind and n < len(versions)
+                    and all(versions.get(p) == v for p, v in candidate.versions.items())
+                    and all(p in candidate.versions for p in order[:n])
+                    and (base is None or len(candidate.versions) > len(base.versions))):
+                base = candidate
+
+    merged = MergedDeck(kind, base)
+    for path in order:
+        if path not in merged.versions:
+            merged.add(path, versions[path], load(path))
+
+    with _merged_lock:
+        _merged[key] = merged
+        while len(_merged) > MAX_MERGED_DECKS:
+            _merged.popitem(last=False)
+    return merged
@@ -0,0 +1,311 @@
+"""
+In-process instrumentation: named spans feeding latency histograms,
+counters, gauges read from other components (cache hit rates, prefetch
+hits), and active session counts. Everything can be rendered in the
+Prometheus text format, written to a file and/or served on a local port.
+
+    TEPS_METRICS_FILE        write the Prometheus text here every 15s
+    TEPS_METRICS_PORT        serve it on http://127.0.0.1:<port>/metrics
+    TEPS_PROFILE_SLOW_MS     cProfile every rerun and keep the dumps of
+                             reruns slower than this (off by default)
+"""
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# A session counts as active if it reran within this many seconds
+SESSION_WINDOW = 5 * 60
+EXPORT_INTERVAL = 15.0 # seconds
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated within a bucket."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1) # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                value = lower + (upper - lower) * (rank - seen) / n
+                return min(max(value, self.min), self.max)
+            seen += n
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.histograms = {} # span name -> Histogram
+        self.counters = {}
+        self.sessions = {} # session id -> last seen (time.time())
+        self._gauges = {} # prefix -> callable returning {name: number}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(seconds)
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def span(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def register_gauges(self, prefix, read):
+        """read() -> {name: number}, called at export time; re-registering replaces it."""
+        with self._lock:
+            self._gauges[prefix] = read
+
+    def touch_session(self, session_id, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.sessions[session_id] = now
+            if len(self.sessions) > 10000:
+                cutoff = now - SESSION_WINDOW
+                self.sessions = {s: t for s, t in self.sessions.items() if t >= cutoff}
+
+    def active_sessions(self, now=None):
+        cutoff = (time.time() if now is None else now) - SESSION_WINDOW
+        with self._lock:
+            return sum(1 for t in self.sessions.values() if t >= cutoff)
+
+    def gauges(self):
+        with self._lock:
+            readers = list(self._gauges.items())
+        values = {'sessions_active': self.active_sessions()}
+        for prefix, read in readers:
+            try:
+                for name, value in read().items():
+                    values[prefix + '_' + name] = value
+            except Exception:
+                logger.exception("Metrics gauge %s failed", prefix)
+        return values
+
+    def snapshot(self):
+        """Rows for the admin page: one per span, slowest total first."""
+        with self._lock:
+            rows = [{
+                'span': name,
+                'count': h.count,
+                'total_ms': h.sum * 1000,
+                'mean_ms': h.sum / h.count * 1000 if h.count else 0.0,
+                'p50_ms': h.quantile(0.5) * 1000,
+                'p95_ms': h.quantile(0.95) * 1000,
+                'p99_ms': h.quantile(0.99) * 1000,
+                'max_ms': h.max * 1000,
+            } for name, h in self.histograms.items()]
+        rows.sort(key=lambda r: -r['total_ms'])
+        return rows
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            '# HELP teps_span_seconds Time spent in instrumented spans.',
+            '# TYPE teps_span_seconds histogram',
+        ]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            for name, h in histograms:
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ('+Inf',), h.counts):
+                    cumulative += n
+                    le = bound if bound == '+Inf' else repr(bound)
+                    lines.append('teps_span_seconds_bucket{span="%s",le="%s"} %d' % (name, le, cumulative))
+                lines.append('teps_span_seconds_sum{span="%s"} %r' % (name, h.sum))
+                lines.append('teps_span_seconds_count{span="%s"} %d' % (name, h.count))
+        for name, value in counters:
+            metric = 'teps_' + _metric_name(name) + '_total'
+            lines += ['# TYPE %s counter' % metric, '%s %d' % (metric, value)]
+        for name, value in sorted(self.gauges().items()):
+            metric = 'teps_' + _metric_name(name)
+            lines += ['# TYPE %s gauge' % metric, '%s %r' % (metric, float(value))]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        with atomic_write(path, encoding='utf-8') as f:
+            f.write(self.prometheus())
+
+
+def _metric_name(name):
+    return ''.join(c if c.isalnum() else '_' for c in name).lower()
+
+
+class SlowRerunProfiler:
+    """
+    Profiles each rerun with cProfile and keeps the dump only if the rerun
+    took longer than threshold_ms. cProfile slows everything down, so this
+    is off unless TEPS_PROFILE_SLOW_MS is set. Only one rerun is profiled
+    at a time: since Python 3.12 a second active cProfile raises, so reruns
+    that overlap a profiled one just run unprofiled.
+    """
+    def __init__(self, threshold_ms, out_dir):
+        self.threshold_ms = threshold_ms
+        self.out_dir = out_dir
+        self.dumped = 0
+        self.skipped = 0 # reruns not profiled because another one was
+        self._busy = threading.Lock()
+
+    @contextmanager
+    def profile(self, label):
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            yield
+            return
+        try:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler (a debugger, coverage) owns the hook
+                self.skipped += 1
+                yield
+                return
+            t0 = time.perf_counter()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                if elapsed_ms >= self.threshold_ms:
+                    self._dump(profiler, label, elapsed_ms)
+        finally:
+            self._busy.release()
+
+    def _dump(self, profiler, label, elapsed_ms):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            path = os.path.join(self.out_dir, 'rerun-%s-%s-%dms.prof' % (
+                time.strftime('%Y%m%d-%H%M%S'), _metric_name(label), elapsed_ms))
+            profiler.dump_stats(path)
+            self.dumped += 1
+            logger.info("Slow rerun (%.0fms), profile saved to %s", elapsed_ms, path)
+        except OSError as e:
+            logger.warning("Can't save rerun profile: %s", e)
+
+
+metrics = Metrics()
+
+
+def span(name):
+    """with span('loader.load_decks'): ... records into the process-wide metrics."""
+    return metrics.span(name)
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with metrics.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+_profilers = {}
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def get_rerun_profiler(out_dir):
+    """SlowRerunProfiler writing to out_dir, or None unless TEPS_PROFILE_SLOW_MS is set."""
+    threshold = os.environ.get('TEPS_PROFILE_SLOW_MS')
+    if not threshold:
+        return None
+    with _exporters_lock:
+        profiler = _profilers.get(out_dir)
+        if profiler is None:
+            profiler = _profilers[out_dir] = SlowRerunProfiler(float(threshold), out_dir)
+        return profiler
+
+
+def _metrics_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return _MetricsHandler
+
+
+def start_exporters():
+    """
+    Starts the file writer (TEPS_METRICS_FILE) and the HTTP endpoint
+    (TEPS_METRICS_PORT) once per process; both are optional.
+    """
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    path = os.environ.get('TEPS_METRICS_FILE')
+    if path:
+        def write_loop():
+            while True:
+                try:
+                    metrics.write_prometheus(path)
+                except OSError as e:
+                    logger.warning("Can't write metrics to %s: %s", path, e)
+                time.sleep(EXPORT_INTERVAL)
+        threading.Thread(target=write_loop, name='metrics-file', daemon=True).start()
+
+    port = os.environ.get('TEPS_METRICS_PORT')
+    if port:
+        # http.server is a noticeable share of import time; only load it when serving
+        from http.server import ThreadingHTTPServer
+        try:
+            server = ThreadingHTTPServer(('127.0.0.1', int(port)), _metrics_handler())
+        except OSError as e:
+            logger.warning("Can't serve metrics on port %s: %s", port, e)
+        else:
+            threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
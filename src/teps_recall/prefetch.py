@@ -0,0 +1,88 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+# Sessions with a speculative quiz in flight; the oldest are dropped first
+MAX_OWNERS = 256
+
+
+class QuizPrefetcher:
+    """
+    Builds the quiz a session is probably about to start on a small thread
+    pool, while the user is still on the setup or result screen. Each
+    session (owner) has at most one speculative build, tagged with the key
+    it was made for (selection, question count, options); changing the
+    settings replaces it. take() hands the quiz over only if the key still
+    matches, waiting for a build that is already under way.
+    """
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quiz-prefetch')
+        self._pending = OrderedDict() # owner -> (key, future)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def submit(self, owner, key, build):
+        """Starts build() for owner unless the same key is already built or building."""
+        with self._lock:
+            entry = self._pending.get(owner)
+            if entry is not None and entry[0] == key:
+                self._pending.move_to_end(owner)
+                return
+            if entry is not None:
+                entry[1].cancel() # only stops it if no worker picked it up yet
+            self._pending[owner] = (key, self._executor.submit(build))
+            self._pending.move_to_end(owner)
+            while len(self._pending) > MAX_OWNERS:
+                _, (_, old) = self._pending.popitem(last=False)
+                old.cancel()
+
+    def take(self, owner, key):
+        """
+        The quiz built for owner and key, or None if there is none (or the
+        build failed); the caller then builds it inline as before.
+        """
+        with self._lock:
+            entry = self._pending.get(owner)
+            if entry is None or entry[0] != key:
+                self.misses += 1
+                return None
+            del self._pending[owner]
+        try:
+            result = entry[1].result()
+        except Exception:
+            logger.debug("Prefetched quiz for %s failed", owner, exc_info=True)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def discard(self, owner):
+        with self._lock:
+            entry = self._pending.pop(owner, None)
+        if entry is not None:
+            entry[1].cancel()
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """
+    Process-wide QuizPrefetcher with TEPS_PREFETCH_WORKERS threads, or None
+    if that is 0 (quizzes are then always built in the click handler).
+    """
+    global _prefetcher
+    workers = int(os.environ.get('TEPS_PREFETCH_WORKERS', DEFAULT_WORKERS))
+    if workers <= 0:
+        return None
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = QuizPrefetcher(workers)
+        return _prefetcher
@@ -0,0 +1,185 @@
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 1.0 # seconds
+DEFAULT_MAX_QUEUE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    deck TEXT NOT NULL,
+    item TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    latency_ms INTEGER,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_user_ts ON answers (user_id, ts);
+"""
+
+_STOP = object()
+
+
+class _Task:
+    """A call deferred to the writer thread (see ProgressStore.defer)."""
+    __slots__ = ('fn', 'args')
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+
+
+class ProgressStore:
+    """
+    Write-behind log of answer events. record() only puts the event on a
+    bounded in-memory queue; a background thread writes them to SQLite (WAL)
+    in batches of batch_size or every flush_interval seconds, whichever
+    comes first. Pending events are flushed at interpreter shutdown.
+    Other slow writes on the answer path (SRS grades) ride the same queue
+    via defer().
+    """
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, max_queue=DEFAULT_MAX_QUEUE):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0 # events lost because the queue was full
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._sinks = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='progress-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, user_id, deck, item, correct, latency_ms=None, ts=None):
+        """Never blocks: if the writer has fallen that far behind, the event is dropped."""
+        event = (user_id, deck, item, int(bool(correct)), latency_ms, time.time() if ts is None else ts)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def defer(self, fn, *args):
+        """
+        Runs fn(*args) on the writer thread with the next batch, in the order
+        it was queued. Never blocks; dropped like an event if the queue is full.
+        """
+        try:
+            self._queue.put_nowait(_Task(fn, args))
+        except queue.Full:
+            self.dropped += 1
+
+    def add_sink(self, sink):
+        """sink(batch) also receives every batch, on the writer thread (e.g. AnswerLog.append)."""
+        if sink not in self._sinks:
+            self._sinks.append(sink)
+
+    def flush(self):
+        """Blocks until everything recorded so far is on disk."""
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            logger.warning("Progress log %s unavailable, answers won't be saved: %s", self.path, e)
+            conn = None
+
+        batch = []
+        tasks = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if event is _STOP:
+                    stopping = True
+                elif isinstance(event, _Task):
+                    tasks.append(event)
+                else:
+                    batch.append(event)
+            except queue.Empty:
+                pass
+
+            pending = len(batch) + len(tasks)
+            if pending and (stopping or pending >= self.batch_size or time.monotonic() >= deadline):
+                if batch:
+                    self._write(conn, batch)
+                self._run_tasks(tasks)
+                batch = []
+                tasks = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+        if conn is not None:
+            conn.close()
+        self._queue.task_done() # the stop marker
+
+    def _write(self, conn, batch):
+        for sink in list(self._sinks):
+            try:
+                sink(batch)
+            except Exception:
+                logger.exception("Progress sink %r failed on %d events", sink, len(batch))
+        if conn is None:
+            for _ in batch:
+                self._queue.task_done()
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO answers (user_id, deck, item, correct, latency_ms, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                    batch
+                )
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logger.warning("Dropping %d answer events: %s", len(batch), e)
+        for _ in batch:
+            self._queue.task_done()
+
+    def _run_tasks(self, tasks):
+        for task in tasks:
+            try:
+                task.fn(*task.args)
+            except Exception:
+                logger.exception("Deferred write %r failed", task.fn)
+            self._queue.task_done()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_progress_store(path, batch_size=None, flush_interval=None):
+    """
+    Process-wide ProgressStore for path. Batch size and flush interval
+    default to TEPS_PROGRESS_BATCH_SIZE / TEPS_PROGRESS_FLUSH_INTERVAL.
+    """
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            if batch_size is None:
+                batch_size = int(os.environ.get('TEPS_PROGRESS_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+            if flush_interval is None:
+                flush_interval = float(os.environ.get('TEPS_PROGRESS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+            store = ProgressStore(path, batch_size, flush_interval)
+            _stores[path] = store
+        return store
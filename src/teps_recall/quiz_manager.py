@@ -0,0 +1,323 @@
+import copy
+import random
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+
+# Every vocabulary question shows the correct meaning plus this many others
+NUM_DISTRACTORS = 3
+# Hard distractors are drawn from this many nearest neighbours
+HARD_CANDIDATES = 5
+
+
+class DistractorPool:
+    """
+    Deduplicated meaning index for one deck. Draws k distinct wrong meanings
+    in O(k) without replacement, instead of rejection-sampling the deck.
+    """
+    def __init__(self, data=()):
+        self.meanings = []
+        self.positions = {} # meaning -> index in self.meanings
+        for item in data:
+            self.add(item['meaning'])
+
+    def add(self, meaning):
+        if meaning not in self.positions:
+            self.positions[meaning] = len(self.meanings)
+            self.meanings.append(meaning)
+
+    def copy(self):
+        pool = DistractorPool()
+        pool.meanings = list(self.meanings)
+        pool.positions = dict(self.positions)
+        return pool
+
+    def __len__(self):
+        return len(self.meanings)
+
+    def draw(self, k, exclude, rng=random):
+        """
+        Picks k distinct meaning positions other than exclude (a position).
+        Sampling runs over the other n-1 slots and shifts past the excluded
+        one, so nothing is rejected and the cost doesn't depend on the deck size.
+        """
+        n = len(self.meanings)
+        available = n - 1 if exclude is not None else n
+        if k > available:
+            raise ValueError(f"Only {available} other distinct meanings, need {k}.")
+        picks = rng.sample(range(available), k)
+        if exclude is not None:
+            picks = [p + 1 if p >= exclude else p for p in picks]
+        return picks
+
+
+_pools = OrderedDict() # id(deck) -> (deck, pool); holding the deck keeps its id unique
+_pools_lock = threading.Lock()
+MAX_CACHED_POOLS = 32
+
+
+def get_distractor_pool(data):
+    """
+    Returns the DistractorPool for a deck, building it only the first time.
+    Decks from DataLoader are shared, so every session reuses one index.
+    Merged decks bring the pool they built while merging.
+    """
+    pool = getattr(data, 'distractor_pool', None)
+    if pool is not None:
+        return pool
+    key = id(data)
+    with _pools_lock:
+        entry = _pools.get(key)
+        if entry is not None and entry[0] is data:
+            _pools.move_to_end(key)
+            return entry[1]
+    pool = DistractorPool(data)
+    with _pools_lock:
+        _pools[key] = (data, pool)
+        while len(_pools) > MAX_CACHED_POOLS:
+            _pools.popitem(last=False)
+    return pool
+
+
+def select_indices(data, num_questions, scheduler=None, key_field='word', seed=None):
+    """
+    Deck indices of the items to ask: a seeded uniform sample of
+    num_questions items, O(num_questions) for any deck size, or review
+    order when a spaced-repetition scheduler (see srs.py) is given.
+    """
+    if scheduler is not None:
+        return scheduler.select(data, num_questions, key_field, random.Random(seed))
+    return random.Random(seed).sample(range(len(data)), num_questions)
+
+
+class QuestionList(Sequence):
+    """
+    The questions of a quiz, built on first access from (seed, position)
+    and memoized, so revisiting an index returns the same question and the
+    first one is ready no matter how long the quiz is.
+    """
+    def __init__(self, quiz, order, length, seed):
+        self.quiz = quiz
+        self.order = order
+        self.length = length
+        self.seed = seed
+        self._built = {}
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("question index out of range")
+        question = self._built.get(index)
+        if question is None:
+            rng = random.Random(self.seed * 1000003 + index)
+            question = self.quiz.make_question(self.order[index], rng)
+            self._built[index] = question
+        return question
+
+
+class BaseQuiz:
+    """
+    Shared question selection. Subclasses set key_field and implement
+    make_question(item_index, rng).
+    """
+    key_field = 'word'
+
+    def __init__(self, data, scheduler=None):
+        self.data = data
+        self.scheduler = scheduler
+        self.questions = []
+        self.seed = None
+
+    def prepare_quiz(self, num_questions, seed=None, lazy=False, num_items=None):
+        """
+        Picks the questions. Everything is derived from seed, so the same
+        seed gives the same quiz; with lazy=True questions are only built
+        when get_question() first asks for them. If num_items is given,
+        only the first num_items rows are asked and the rest of the deck
+        just supplies distractors (see DataLoader.sample_decks).
+        """
+        asked = self.data if num_items is None else self.data[:num_items]
+        if num_questions > len(asked):
+            num_questions = len(asked)
+        self.seed = random.getrandbits(32) if seed is None else seed
+
+        order = select_indices(asked, num_questions, self.scheduler, self.key_field, self.seed)
+        questions = QuestionList(self, order, min(num_questions, len(order)), self.seed)
+        self.questions = questions if lazy else list(questions)
+
+    def retry(self, questions, seed=None):
+        """
+        A new quiz over the same deck that asks the items of questions
+        again, in a new order and with freshly drawn distractors. The deck,
+        distractor pool and scheduler are shared, not copied.
+        """
+        quiz = copy.copy(self)
+        quiz.seed = random.getrandbits(32) if seed is None else seed
+        order = [q.item for q in questions]
+        random.Random(quiz.seed).shuffle(order)
+        quiz.questions = list(QuestionList(quiz, order, len(order), quiz.seed))
+        return quiz
+
+    def get_question(self, index):
+        if 0 <= index < len(self.questions):
+            return self.questions[index]
+        return None
+
+
+class Question:
+    """
+    Compact question that points into the shared, read-only deck by index
+    instead of copying its strings; text/options/etc. are looked up on
+    access. Supports q['text'] and q.get('meaning') like the old dicts.
+    """
+    __slots__ = ('deck', 'item')
+
+    def __init__(self, deck, item):
+        self.deck = deck
+        self.item = item
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    @property
+    def row(self):
+        return self.deck[self.item]
+
+
+class VocabularyQuestion(Question):
+    __slots__ = ('pool', 'choices', 'correct_index')
+
+    def __init__(self, deck, item, pool, choices, correct_index):
+        super().__init__(deck, item)
+        self.pool = pool
+        self.choices = choices # positions in pool.meanings, in display order
+        self.correct_index = correct_index
+
+    @property
+    def text(self):
+        return self.row['word']
+
+    key = text
+
+    @property
+    def meaning(self):
+        return self.row['meaning']
+
+    @property
+    def options(self):
+        return [self.pool.meanings[c] for c in self.choices]
+
+
+class GrammarQuestion(Question):
+    __slots__ = ()
+
+    # Fixed options for this specific grammar type (Gerund vs Infinitive)
+    OPTIONS = ["To-v (to 부정사)", "-ing (동명사)"]
+    options = OPTIONS
+
+    @property
+    def word_only(self):
+        return self.row['word']
+
+    key = word_only
+
+    @property
+    def text(self):
+        return f"{self.word_only} [   ?   ]"
+
+    @property
+    def correct_index(self):
+        answer_type = self.row['answer'].lower() # 'to' or 'ing'
+        return 0 if answer_type == 'to' else 1
+
+    @property
+    def meaning(self):
+        return self.row.get('meaning', '')
+
+
+class ListeningQuestion(Question):
+    __slots__ = ()
+
+    options = [] # No options in flashcard mode
+    correct_index = -1
+
+    @property
+    def sentence(self):
+        return self.row['sentence']
+
+    # Map sentence to text for UI consistency
+    text = sentence
+    key = sentence
+
+    @property
+    def meaning(self):
+        return self.row['meaning']
+
+
+class VocabularyQuiz(BaseQuiz):
+    def __init__(self, data, similarity=None, scheduler=None):
+        """
+        similarity: optional object with neighbors(meaning) -> [[meaning, score], ...]
+        (see similarity_index.py); its close matches are used as hard distractors.
+        scheduler: optional SrsScheduler that picks which items are asked.
+        """
+        super().__init__(data, scheduler)
+        self.similarity = similarity
+        self.pool = get_distractor_pool(data)
+        if len(self.pool) < NUM_DISTRACTORS + 1:
+            raise ValueError(
+                f"Need at least {NUM_DISTRACTORS + 1} distinct meanings, found {len(self.pool)}."
+            )
+
+    def make_question(self, i, rng):
+        correct = self.pool.positions[self.data[i]['meaning']]
+
+        choices = self.pick_distractors(correct, rng) + [correct]
+        rng.shuffle(choices)
+
+        return VocabularyQuestion(self.data, i, self.pool, tuple(choices), choices.index(correct))
+
+    def pick_distractors(self, correct, rng=random):
+        """
+        Up to two look-alike meanings from the similarity index, topped up
+        with random ones from the pool. Works on pool positions.
+        """
+        drawn = self.pool.draw(NUM_DISTRACTORS, correct, rng)
+        if self.similarity is None:
+            return drawn
+
+        positions = self.pool.positions
+        neighbors = self.similarity.neighbors(self.pool.meanings[correct])[:HARD_CANDIDATES]
+        # Distinct positions only, or one meaning could be shown twice
+        close = list(dict.fromkeys(positions[m] for m, _ in neighbors if m in positions and positions[m] != correct))
+        hard = rng.sample(close, min(len(close), NUM_DISTRACTORS - 1))
+        return hard + [m for m in drawn if m not in hard][:NUM_DISTRACTORS - len(hard)]
+
+
+class GrammarQuiz(BaseQuiz):
+    def __init__(self, data, scheduler=None):
+        super().__init__(data, scheduler)
+        self.options = GrammarQuestion.OPTIONS
+
+    def make_question(self, i, rng):
+        return GrammarQuestion(self.data, i)
+
+
+class ListeningQuiz(BaseQuiz):
+    # In listening mode, question IS the item itself (no distractors)
+    key_field = 'sentence'
+
+    def make_question(self, i, rng):
+        return ListeningQuestion(self.data, i)
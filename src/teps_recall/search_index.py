@@ -0,0 +1,461 @@
+"""
+Cross-deck word search: an inverted index over every deck under data/,
+kept in data/.search/ as one segment per deck so a changed deck only
+re-indexes itself.
+
+English is matched by word prefix: each segment keeps its terms sorted and
+a prefix is a bisect range, the flat equivalent of a prefix trie (the same
+trick as the deck listing). Korean is matched by syllable bigrams, where
+the last syllable typed so far may be unfinished:
+- the second syllable of each bigram is in its "open" form (final consonant
+  dropped, compound vowel reduced to its first stroke), so 요야 already
+  finds 요약; a single syllable is looked up by its open form, so 고 finds 과;
+- initial-consonant bigrams, so ㅇㅇ finds 요약 (초성 검색).
+Candidates from the index are confirmed against the row's keystroke
+(jamo) string, then ranked.
+"""
+import bisect
+import functools
+import hashlib
+import heapq
+import json
+import logging
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+
+from .atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+SEARCH_VERSION = 2
+SEARCH_DIR = '.search'
+
+# Segment file (little endian): 8s magic, u32 meta length, JSON meta, then
+# the blobs listed in meta back to back: each column and the sorted terms
+# and grams as '\0'-joined UTF-8, and the posting arrays as raw u32.
+SEGMENT_SUFFIX = '.seg'
+MAGIC = b'TEPSIX01'
+HEADER = struct.Struct('<8sI')
+KEY_LISTS = ('terms', 'grams')
+ARRAYS = ('term_offsets', 'term_rows', 'gram_offsets', 'gram_rows')
+
+# Searchable columns per mode; the first is shown as the hit's headword
+FIELDS = {
+    'vocabulary': ('word', 'meaning'),
+    'reading': ('word', 'meaning'),
+    'grammar': ('word', 'answer', 'meaning'),
+    'listening': ('sentence', 'meaning'),
+}
+MODE_ORDER = {mode: n for n, mode in enumerate(FIELDS)}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+HANGUL_RE = re.compile(r"[가-힣ㄱ-ㅣ]+")
+SYLLABLE_RE = re.compile(r"[가-힣]+")
+SENSE_SPLIT_RE = re.compile(r"[,;/·]")
+
+HANGUL_BASE = 0xAC00
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSEONG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+JONGSEONG = ('', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+             'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+# Compound letters as they are typed, one key at a time
+STROKES = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
+# Compound vowel index -> index of its first stroke
+FIRST_VOWEL = {9: 8, 10: 8, 11: 8, 14: 13, 15: 13, 16: 13, 19: 18}
+
+
+# str.translate tables: syllable -> initial consonant, syllable -> keystrokes
+_INITIALS = {c: CHOSEONG[(c - HANGUL_BASE) // 588] for c in range(HANGUL_BASE, HANGUL_BASE + 11172)}
+_KEYSTROKES = {ord(letter): strokes for letter, strokes in STROKES.items()}
+for _c in range(HANGUL_BASE, HANGUL_BASE + 11172):
+    _idx = _c - HANGUL_BASE
+    _KEYSTROKES[_c] = ''.join(STROKES.get(letter, letter) for letter in
+                              (CHOSEONG[_idx // 588], JUNGSEONG[_idx % 588 // 28], JONGSEONG[_idx % 28]))
+del _c, _idx
+
+
+def _is_syllable(c):
+    return '가' <= c <= '힣'
+
+
+def keystrokes(text):
+    """Lowercased text with every Hangul syllable spelled out as typed jamo."""
+    return text.lower().translate(_KEYSTROKES)
+
+
+def initials(text):
+    """Text with every syllable replaced by its initial consonant."""
+    return text.translate(_INITIALS)
+
+
+@functools.lru_cache(maxsize=None)
+def open_key(syllable):
+    """The syllable as it looks part-way through typing it: 곽 -> 고."""
+    idx = ord(syllable) - HANGUL_BASE
+    vowel = idx % 588 // 28
+    return chr(HANGUL_BASE + idx // 588 * 588 + FIRST_VOWEL.get(vowel, vowel) * 28)
+
+
+def _is_initials(run):
+    return all('ㄱ' <= c <= 'ㅎ' for c in run)
+
+
+def row_keys(text):
+    """
+    Index keys of a row's text: 'o' open syllables, 'h' bigrams of a
+    syllable and the open form of the next one, 'c' initial-consonant bigrams.
+    """
+    keys = set()
+    for run in SYLLABLE_RE.findall(text):
+        keys.update('o' + open_key(s) for s in run)
+        keys.update('h' + run[i] + open_key(run[i + 1]) for i in range(len(run) - 1))
+        cho = initials(run)
+        keys.update('c' + cho[i:i + 2] for i in range(len(cho) - 1))
+    return keys
+
+
+class Query:
+    """A parsed search string: English word prefixes and Hangul runs."""
+    def __init__(self, text):
+        self.text = ' '.join(text.lower().split())
+        self.terms = WORD_RE.findall(self.text)
+        self.runs = HANGUL_RE.findall(self.text)
+        self.keys = set()
+        for run in self.runs:
+            if _is_initials(run):
+                self.keys.update('c' + run[i:i + 2] for i in range(len(run) - 1))
+                continue
+            for part in SYLLABLE_RE.findall(run):
+                if len(part) == 1:
+                    self.keys.add('o' + open_key(part))
+                    continue
+                # Pairs are syllable + open key, which also holds for a half-typed last syllable
+                self.keys.update('h' + part[i] + open_key(part[i + 1]) for i in range(len(part) - 1))
+        self.phrase = ' '.join(self.terms)
+
+    @property
+    def searchable(self):
+        # A lone consonant has no key: it would match most of the library
+        return bool(self.terms or self.keys)
+
+    def confirm(self, values):
+        """Whether a candidate row really contains every Hangul run."""
+        if not self.runs:
+            return True
+        text = ' '.join(values).lower()
+        strokes = None
+        for run in self.runs:
+            if run in text:
+                continue
+            if _is_initials(run):
+                if run not in initials(text):
+                    return False
+                continue
+            if strokes is None:
+                strokes = keystrokes(text)
+            if keystrokes(run) not in strokes:
+                return False
+        return True
+
+    def score(self, values):
+        """Higher is better: whole-headword matches first, then prefixes, then substrings."""
+        score = 0
+        head = values[0].lower()
+        if self.terms:
+            if head == self.phrase:
+                score += 100
+            elif head.startswith(self.phrase):
+                score += 80
+            else:
+                words = set(WORD_RE.findall(' '.join(values).lower()))
+                score += 60 if all(t in words for t in self.terms) else 40
+        senses = [s.strip() for v in values for s in SENSE_SPLIT_RE.split(v.lower())] if self.runs else ()
+        for run in self.runs:
+            if run in senses:
+                score += 90
+            elif any(s.startswith(run) for s in senses):
+                score += 70
+            elif any(run in s for s in senses):
+                score += 50
+            else:
+                score += 30
+        return score
+
+
+def _pack(postings):
+    """{key: rows} -> (sorted keys, offsets, rows): one flat array instead of one per key."""
+    keys = sorted(postings)
+    offsets = array('I', [0])
+    rows = array('I')
+    for key in keys:
+        rows.extend(postings[key])
+        offsets.append(len(rows))
+    return keys, offsets, rows
+
+
+class Segment:
+    """
+    The index of one deck: its rows plus term and Hangul postings, each
+    stored as sorted keys with offsets into one flat row array.
+    """
+    def __init__(self, key, mode, mtime_ns, size, rows):
+        self.key = key
+        self.mode = mode
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in FIELDS[mode]]
+        terms = {}
+        grams = {}
+        for n, values in enumerate(rows):
+            text = ' '.join(values)
+            for term in set(WORD_RE.findall(text.lower())):
+                terms.setdefault(term, []).append(n)
+            for gram in row_keys(text):
+                grams.setdefault(gram, []).append(n)
+        self.terms, self.term_offsets, self.term_rows = _pack(terms)
+        self.grams, self.gram_offsets, self.gram_rows = _pack(grams)
+
+    def to_bytes(self):
+        """
+        The segment file. A few large blobs load far faster than hundreds of
+        thousands of small objects, and unlike a pickle nothing in the file
+        is ever executed, whoever can write to data/.
+        """
+        blobs = ['\0'.join(column).encode('utf-8') for column in self.columns]
+        blobs += ['\0'.join(getattr(self, name)).encode('utf-8') for name in KEY_LISTS]
+        for name in ARRAYS:
+            packed = getattr(self, name)
+            if sys.byteorder != 'little':
+                packed = array('I', packed)
+                packed.byteswap()
+            blobs.append(packed.tobytes())
+        meta = {k: self.__dict__[k] for k in ('key', 'mode', 'mtime_ns', 'size')}
+        meta.update(version=SEARCH_VERSION, length=len(self), blobs=[len(blob) for blob in blobs])
+        meta_raw = json.dumps(meta).encode('utf-8')
+        return HEADER.pack(MAGIC, len(meta_raw)) + meta_raw + b''.join(blobs)
+
+    @classmethod
+    def from_bytes(cls, raw):
+        """Reads a segment file; raises ValueError if it is not a consistent one of this version."""
+        raw = memoryview(raw)
+        magic, meta_len = HEADER.unpack_from(raw, 0)
+        if magic != MAGIC:
+            raise ValueError("not a search segment")
+        meta = json.loads(bytes(raw[HEADER.size:HEADER.size + meta_len]))
+        if meta.get('version') != SEARCH_VERSION or meta.get('mode') not in FIELDS:
+            raise ValueError("search segment of another version")
+        blobs = []
+        pos = HEADER.size + meta_len
+        for n in meta['blobs']:
+            blobs.append(raw[pos:pos + n])
+            pos += n
+        width = len(FIELDS[meta['mode']])
+        if pos != len(raw) or len(blobs) != width + len(KEY_LISTS) + len(ARRAYS):
+            raise ValueError("truncated search segment")
+
+        segment = cls.__new__(cls)
+        segment.__dict__.update({k: meta[k] for k in ('key', 'mode', 'mtime_ns', 'size')})
+        length = meta['length']
+        segment.columns = [str(blob, 'utf-8').split('\0') if length else [] for blob in blobs[:width]]
+        for name, blob in zip(KEY_LISTS, blobs[width:]):
+            setattr(segment, name, str(blob, 'utf-8').split('\0') if len(blob) else [])
+        for name, blob in zip(ARRAYS, blobs[width + len(KEY_LISTS):]):
+            packed = array('I')
+            packed.frombytes(blob)
+            if sys.byteorder != 'little':
+                packed.byteswap()
+            setattr(segment, name, packed)
+        # Cheap shape checks; a damaged file is rebuilt rather than failing queries
+        if (any(len(column) != length for column in segment.columns)
+                or any(len(getattr(segment, keys)) + 1 != len(getattr(segment, offsets))
+                       or getattr(segment, offsets)[-1] != len(getattr(segment, rows))
+                       for keys, offsets, rows in (('terms', 'term_offsets', 'term_rows'),
+                                                   ('grams', 'gram_offsets', 'gram_rows')))):
+            raise ValueError("inconsistent search segment")
+        return segment
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def row(self, n):
+        return tuple(column[n] for column in self.columns)
+
+    def prefix_rows(self, prefix):
+        """Rows with a word starting with prefix."""
+        lo = bisect.bisect_left(self.terms, prefix)
+        hi = bisect.bisect_left(self.terms, prefix + '\uffff', lo)
+        rows = self.term_rows[self.term_offsets[lo]:self.term_offsets[hi]]
+        return rows if hi - lo == 1 else set(rows)
+
+    def gram_rows_of(self, gram):
+        i = bisect.bisect_left(self.grams, gram)
+        if i == len(self.grams) or self.grams[i] != gram:
+            return ()
+        return self.gram_rows[self.gram_offsets[i]:self.gram_offsets[i + 1]]
+
+    def candidates(self, query):
+        postings = [self.prefix_rows(t) for t in query.terms]
+        postings += [self.gram_rows_of(k) for k in query.keys]
+        postings.sort(key=len)
+        if not postings or not postings[0]:
+            return ()
+        rows = set(postings[0])
+        for other in postings[1:]:
+            rows.intersection_update(other)
+            if not rows:
+                break
+        return rows
+
+
+class SearchIndex:
+    """
+    Every deck's segment, loaded from data/.search/ and brought up to date
+    by update(). Segment files hold data only (see Segment.to_bytes).
+    """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.dir = os.path.join(data_dir, SEARCH_DIR)
+        self.segments = {}
+        self.version = None # DataWatcher version the index was last checked against
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._load()
+
+    def _segment_path(self, key):
+        return os.path.join(self.dir, hashlib.sha1(key.encode('utf-8')).hexdigest()[:16] + SEGMENT_SUFFIX)
+
+    def _load(self):
+        try:
+            names = os.listdir(self.dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.dir, name)
+            if name.endswith('.pickle'):
+                # Version 1 segments; never unpickled, just removed
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    segment = Segment.from_bytes(f.read())
+            except (OSError, ValueError, KeyError, TypeError, struct.error):
+                continue
+            self.segments[segment.key] = segment
+
+    def _save(self, segment):
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            path = self._segment_path(segment.key)
+            with atomic_write(path, 'wb') as f:
+                f.write(segment.to_bytes())
+        except OSError:
+            # Read-only data dir: keep the in-memory index only
+            pass
+
+    def _drop(self, key):
+        try:
+            os.remove(self._segment_path(key))
+        except OSError:
+            pass
+
+    def _key(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.data_dir).replace(os.sep, '/')
+
+    def update(self, files_by_mode, loader):
+        """
+        Re-indexes decks whose mtime or size changed and drops decks that
+        are gone. Returns the number of decks indexed.
+        """
+        with self._update_lock:
+            current = {}
+            for mode, paths in files_by_mode.items():
+                for path in paths:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    current[self._key(path)] = (mode, path, st)
+
+            indexed = 0
+            for key, (mode, path, st) in current.items():
+                old = self.segments.get(key)
+                if (old is not None and old.mode == mode
+                        and old.mtime_ns == st.st_mtime_ns and old.size == st.st_size):
+                    continue
+                fields = FIELDS[mode]
+                # NUL separates the cells once the segment is saved
+                rows = [tuple(row.get(f, '').replace('\0', '') for f in fields)
+                        for row in loader.iter_rows(mode, path)]
+                segment = Segment(key, mode, st.st_mtime_ns, st.st_size, rows)
+                self._save(segment)
+                with self._lock:
+                    self.segments[key] = segment
+                indexed += 1
+
+            for key in [k for k in self.segments if k not in current]:
+                with self._lock:
+                    del self.segments[key]
+                self._drop(key)
+            if indexed:
+                logger.info("search index: %d decks indexed", indexed)
+            return indexed
+
+    def search(self, text, modes=None, limit=20):
+        """
+        Ranked hits for text: {'total', 'hits'}, each hit a dict with mode,
+        file (relative to data/), row (0-based data row) and the row's fields.
+        """
+        query = Query(text)
+        if not query.searchable:
+            return {'total': 0, 'hits': []}
+        with self._lock:
+            segments = [s for s in self.segments.values() if modes is None or s.mode in modes]
+
+        total = 0
+        ranked = []
+        for segment in segments:
+            order = MODE_ORDER[segment.mode]
+            for n in segment.candidates(query):
+                values = segment.row(n)
+                if not query.confirm(values):
+                    continue
+                total += 1
+                ranked.append((-query.score(values), len(values[0]), order, segment.key, n))
+
+        hits = []
+        for neg_score, _, _, key, n in heapq.nsmallest(limit, ranked):
+            segment = self.segments.get(key)
+            if segment is None:
+                continue
+            hit = {'mode': segment.mode, 'file': key, 'row': n, 'score': -neg_score}
+            hit.update(zip(FIELDS[segment.mode], segment.row(n)))
+            hits.append(hit)
+        return {'total': total, 'hits': hits}
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(data_dir):
+    """Process-wide SearchIndex for a data directory."""
+    data_dir = os.path.abspath(data_dir)
+    with _indexes_lock:
+        index = _indexes.get(data_dir)
+        if index is None:
+            index = SearchIndex(data_dir)
+            _indexes[data_dir] = index
+        return index
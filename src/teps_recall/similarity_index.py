@@ -0,0 +1,190 @@
+import itertools
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+
+from .atomic_file import atomic_write
+
+INDEX_VERSION = 1
+
+# Neighbours kept per meaning
+NEIGHBORS = 8
+# Features shared by more entries than this say nothing about similarity
+# (e.g. the '하다' ending of most Korean verb glosses) and are skipped
+MAX_POSTING = 300
+# Only the rarest features of an entry are used to find its candidates
+QUERY_FEATURES = 12
+
+_STRIP = re.compile(r'[\s,.;:/()\[\]~\-]+')
+
+
+def similar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.similar.json'
+
+
+def features(word, meaning):
+    """
+    Character bigrams of the Korean gloss plus padded trigrams of the
+    English headword, namespaced so the two never match each other.
+    """
+    gloss = _STRIP.sub('', meaning)
+    feats = {'m:' + gloss[i:i + 2] for i in range(len(gloss) - 1)}
+    if len(gloss) == 1:
+        feats.add('m:' + gloss)
+    head = '^' + _STRIP.sub(' ', word.lower()).strip() + '$'
+    feats.update('w:' + head[i:i + 3] for i in range(len(head) - 2))
+    return feats
+
+
+class SimilarityIndex:
+    """
+    Nearest-neighbour index over a deck's distinct meanings, persisted as
+    <deck>.similar.json. Lookups are a dict access; building uses an
+    inverted index over n-gram features so no pair of entries is compared
+    unless they share a reasonably rare feature.
+    """
+    def __init__(self, entries=None, source_size=None, source_mtime_ns=None):
+        # meaning -> {'word': str, 'neighbors': [[meaning, score], ...]}
+        self.entries = entries or {}
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+
+    def neighbors(self, meaning):
+        entry = self.entries.get(meaning)
+        return entry['neighbors'] if entry else []
+
+    def memory_size(self):
+        """Rough bytes held by the entries, for DeckCache's memory cap."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.entries)
+        for meaning, entry in self.entries.items():
+            size += sys.getsizeof(meaning) + sys.getsizeof(entry) + sys.getsizeof(entry['word'])
+            neighbors = entry['neighbors']
+            size += sys.getsizeof(neighbors)
+            for pair in neighbors:
+                size += sys.getsizeof(pair) + sys.getsizeof(pair[0]) + sys.getsizeof(pair[1])
+        return size
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        if raw.get('version') != INDEX_VERSION:
+            raise ValueError("stale similarity index version")
+        return cls(raw['entries'], raw.get('source_size'), raw.get('source_mtime_ns'))
+
+    def save(self, path):
+        payload = {
+            'version': INDEX_VERSION,
+            'source_size': self.source_size,
+            'source_mtime_ns': self.source_mtime_ns,
+            'entries': self.entries,
+        }
+        with atomic_write(path, encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+
+    def update(self, data):
+        """
+        Brings the index in line with data (rows with 'word' and 'meaning').
+        Only meanings that were added, or whose neighbours were removed,
+        are scored again; everything else keeps its stored neighbours.
+        """
+        words = {}
+        for item in data:
+            words.setdefault(item['meaning'], item['word'])
+
+        removed = {m for m, e in self.entries.items() if words.get(m) != e['word']}
+        added = [m for m in words if m not in self.entries or m in removed]
+        for m in removed:
+            del self.entries[m]
+        if not removed and not added:
+            return False
+
+        feats = {m: features(w, m) for m, w in words.items()}
+        postings = defaultdict(list)
+        for m, fs in feats.items():
+            for f in fs:
+                postings[f].append(m)
+
+        for entry in self.entries.values():
+            entry['neighbors'] = [n for n in entry['neighbors'] if n[0] not in removed]
+        stale = {m for m, e in self.entries.items() if len(e['neighbors']) < NEIGHBORS // 2}
+
+        for m in added:
+            self.entries[m] = {'word': words[m], 'neighbors': []}
+        for m in itertools.chain(added, stale):
+            scored = _score(m, feats, postings)
+            self.entries[m]['neighbors'] = scored[:NEIGHBORS]
+            if m in stale:
+                continue
+            # New entries can also be a better neighbour for existing ones
+            for other, score in scored:
+                _offer(self.entries[other]['neighbors'], m, score)
+        return True
+
+
+def _score(meaning, feats, postings):
+    own = feats[meaning]
+    usable = sorted((f for f in own if len(postings[f]) <= MAX_POSTING), key=lambda f: len(postings[f]))
+    counts = Counter(itertools.chain.from_iterable(postings[f] for f in usable[:QUERY_FEATURES]))
+    counts.pop(meaning, None)
+    scored = [
+        [other, round(shared / math.sqrt(len(own) * len(feats[other])), 4)]
+        for other, shared in counts.items()
+    ]
+    scored.sort(key=lambda n: -n[1])
+    return scored[:NEIGHBORS * 2]
+
+
+def _offer(neighbors, meaning, score):
+    if any(n[0] == meaning for n in neighbors):
+        return
+    if len(neighbors) >= NEIGHBORS and score <= neighbors[-1][1]:
+        return
+    neighbors.append([meaning, score])
+    neighbors.sort(key=lambda n: -n[1])
+    del neighbors[NEIGHBORS:]
+
+
+def build_similarity_index(csv_path, data):
+    """
+    Loads the sidecar index for csv_path and updates it for data, writing
+    it back if anything changed. Missing or corrupt sidecars are rebuilt.
+    """
+    path = similar_path(csv_path)
+    try:
+        index = SimilarityIndex.load(path)
+    except (OSError, ValueError, KeyError):
+        index = SimilarityIndex()
+
+    st = os.stat(csv_path)
+    if index.source_size == st.st_size and index.source_mtime_ns == st.st_mtime_ns:
+        return index
+
+    index.update(data)
+    index.source_size = st.st_size
+    index.source_mtime_ns = st.st_mtime_ns
+    try:
+        index.save(path)
+    except OSError:
+        pass
+    return index
+
+
+class SimilarityLookup:
+    """Combines the indexes of several selected decks for one quiz."""
+    def __init__(self, indexes):
+        self.indexes = list(indexes)
+
+    def neighbors(self, meaning):
+        if len(self.indexes) == 1:
+            return self.indexes[0].neighbors(meaning)
+        # Decks that share glosses list the same neighbour; keep its best score
+        best = {}
+        for index in self.indexes:
+            for neighbor, score in index.neighbors(meaning):
+                if score > best.get(neighbor, -1):
+                    best[neighbor] = score
+        return sorted(([m, s] for m, s in best.items()), key=lambda n: -n[1])
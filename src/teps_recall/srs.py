@@ -0,0 +1,174 @@
+import random
+import sqlite3
+import threading
+import time
+
+DAY = 24 * 60 * 60
+# "Again" cards come back within the same study session
+RELEARN_INTERVAL = 10 * 60
+
+# SM-2 grades used by the UI
+GRADE_AGAIN = 1
+GRADE_GOOD = 4
+GRADE_EASY = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cards (
+    user_id TEXT NOT NULL,
+    deck TEXT NOT NULL,
+    item TEXT NOT NULL,
+    ease REAL NOT NULL,
+    interval REAL NOT NULL,
+    reps INTEGER NOT NULL,
+    lapses INTEGER NOT NULL,
+    due REAL NOT NULL,
+    last_review REAL NOT NULL,
+    PRIMARY KEY (user_id, deck, item)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cards_due ON cards (user_id, deck, due);
+"""
+
+
+def sm2(ease, interval, reps, grade):
+    """
+    One SM-2 step. Returns (ease, interval_seconds, reps, lapsed).
+    """
+    ease = max(1.3, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    if grade < 3:
+        return ease, RELEARN_INTERVAL, 0, True
+    if reps == 0:
+        interval = DAY
+    elif reps == 1:
+        interval = 6 * DAY
+    else:
+        interval = interval * ease
+    return ease, interval, reps + 1, False
+
+
+class SrsStore:
+    """
+    Per-user, per-item review state in a local SQLite file. The
+    (user_id, deck, due) index makes "next N due cards" an index range scan.
+    One store is shared by all sessions, so access goes through a lock.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def items_by_due(self, user_id, deck, limit, offset=0, due_before=None, due_after=None):
+        """Item keys of a user's deck, soonest due first, within a due window."""
+        query = "SELECT item FROM cards WHERE user_id = ? AND deck = ?"
+        params = [user_id, deck]
+        if due_before is not None:
+            query += " AND due <= ?"
+            params.append(due_before)
+        if due_after is not None:
+            query += " AND due > ?"
+            params.append(due_after)
+        query += " ORDER BY due LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            return [r[0] for r in self._conn.execute(query, params)]
+
+    def known_items(self, user_id, deck, items):
+        """The subset of items that already have review state."""
+        known = set()
+        items = list(items)
+        with self._lock:
+            for start in range(0, len(items), 500):
+                chunk = items[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT item FROM cards WHERE user_id = ? AND deck = ? AND item IN (%s)"
+                    % ','.join('?' * len(chunk)),
+                    [user_id, deck] + chunk
+                )
+                known.update(r[0] for r in rows)
+        return known
+
+    def review(self, user_id, deck, item, grade, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ease, interval, reps, lapses FROM cards WHERE user_id = ? AND deck = ? AND item = ?",
+                (user_id, deck, item)
+            ).fetchone()
+            ease, interval, reps, lapses = row if row else (2.5, 0.0, 0, 0)
+            ease, interval, reps, lapsed = sm2(ease, interval, reps, grade)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, deck, item, ease, interval, reps, lapses + lapsed, now + interval, now)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SrsScheduler:
+    """
+    Binds a store to one user and deck, and picks quiz items in review
+    order: due cards first, then cards never seen, then the ones due soonest.
+    """
+    def __init__(self, store, user_id, deck):
+        self.store = store
+        self.user_id = user_id
+        self.deck = deck
+
+    def select(self, data, n, key_field, rng=random):
+        """Deck indices of up to n items to ask, in review order."""
+        positions = {}
+        for i, item in enumerate(data):
+            positions.setdefault(item[key_field], i)
+        n = min(n, len(positions))
+        now = time.time()
+
+        picked = self._from_index(positions, n, due_before=now)
+
+        if len(picked) < n:
+            # Unseen cards, checked against the store a batch at a time
+            keys = list(positions)
+            rng.shuffle(keys)
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                known = self.store.known_items(self.user_id, self.deck, batch)
+                picked += [positions[k] for k in batch if k not in known][:n - len(picked)]
+                if len(picked) >= n:
+                    break
+
+        if len(picked) < n:
+            picked += self._from_index(positions, n - len(picked), due_after=now)
+        return picked
+
+    def _from_index(self, positions, n, **window):
+        """Walks the due index in pages, keeping items present in this deck."""
+        picked = []
+        page = max(n * 2, 100)
+        offset = 0
+        while len(picked) < n:
+            items = self.store.items_by_due(self.user_id, self.deck, page, offset, **window)
+            picked += [positions[item] for item in items if item in positions][:n - len(picked)]
+            if len(items) < page:
+                break
+            offset += page
+        return picked
+
+    def review(self, item, grade, now=None):
+        self.store.review(self.user_id, self.deck, item, grade, now)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_srs_store(path):
+    """Process-wide SrsStore for path."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = SrsStore(path)
+            _stores[path] = store
+        return store
@@ -0,0 +1,218 @@
+"""
+Deck validation: everything DataLoader would silently skip or get wrong in
+a CSV, found up front instead of when a student opens the deck. Used by
+src/validate_decks.py, which runs validate_file over a process pool.
+"""
+import csv
+import io
+import os
+import unicodedata
+
+from .atomic_file import atomic_write
+from .catalog import DEFAULT_COLUMNS
+from .csv_codec import decode_bytes, sniff_encoding
+from .merged_deck import KEY_FIELDS, normalize_headword
+from .quiz_manager import NUM_DISTRACTORS
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Line numbers listed per check in the report; the count is always complete
+MAX_LINES = 20
+
+# Multiple-choice modes need the correct meaning plus NUM_DISTRACTORS others
+CHOICE_MODES = ('vocabulary', 'reading')
+
+# First two cells the loader takes for a header row (grammar always has one)
+HEADER_CELLS = {
+    'vocabulary': (('word', 'term'), ('meaning', 'definition', 'answer')),
+    'reading': (('word', 'term'), ('meaning', 'definition', 'answer')),
+    'listening': (('sentence',), ('meaning',)),
+}
+
+
+class FileReport:
+    """Issues found in one deck, grouped by check."""
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+        self.encoding = None
+        self.rows = 0 # rows the loader would yield
+        self.kept = 0 # rows written to the normalized output
+        self.checks = {} # check -> {'level', 'message', 'count', 'lines'}
+
+    def add(self, level, check, message, line=None):
+        entry = self.checks.get(check)
+        if entry is None:
+            entry = self.checks[check] = {'level': level, 'message': message, 'count': 0, 'lines': []}
+        entry['count'] += 1
+        if line is not None and len(entry['lines']) < MAX_LINES:
+            entry['lines'].append(line)
+
+    @property
+    def errors(self):
+        return sum(1 for c in self.checks.values() if c['level'] == ERROR)
+
+    @property
+    def warnings(self):
+        return sum(1 for c in self.checks.values() if c['level'] == WARNING)
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'mode': self.mode,
+            'encoding': self.encoding,
+            'rows': self.rows,
+            'kept': self.kept,
+            'checks': self.checks,
+        }
+
+
+def _decode(raw, report):
+    """Text of the file plus encoding issues: legacy codec, bad bytes, NFD Hangul."""
+    encoding = sniff_encoding(raw)
+    text, used = decode_bytes(raw, report.path)
+    report.encoding = used
+    if used != encoding:
+        report.add(WARNING, 'encoding', f"sniffed {encoding} but only {used} decodes the whole file")
+    if used == 'cp949':
+        report.add(WARNING, 'encoding', "cp949 (legacy Korean); the normalized copy is UTF-8")
+    if '\ufffd' in text:
+        try:
+            raw.decode(used)
+        except UnicodeDecodeError:
+            # decode_bytes' last resort: neither codec reads the whole file
+            replaced = text.count('\ufffd')
+            report.add(ERROR, 'undecodable', f"{replaced} characters could not be decoded and were replaced with U+FFFD")
+    normalized = unicodedata.normalize('NFC', text)
+    if normalized != text:
+        # Decks saved on macOS often spell Hangul as separate jamo
+        report.add(WARNING, 'unicode', "decomposed (NFD) text; normalized to NFC")
+    return normalized
+
+
+def _read_rows(text, mode, report):
+    """
+    (line, cells) of the data rows, with the header resolved the way the
+    loader does it: optional for most modes, required for grammar.
+    """
+    reader = csv.reader(io.StringIO(text, newline=''))
+    columns = list(DEFAULT_COLUMNS[mode])
+    rows = []
+    try:
+        for cells in reader:
+            if not any(c.strip() for c in cells):
+                continue
+            rows.append((reader.line_num, [c.strip() for c in cells]))
+    except csv.Error as e:
+        report.add(ERROR, 'csv', f"CSV error at line {reader.line_num}, the rest of the file is lost: {e}",
+                   reader.line_num)
+
+    header = None
+    if rows:
+        first = [c.lower() for c in rows[0][1]]
+        if mode == 'grammar' or (len(first) >= 2 and first[0] in HEADER_CELLS[mode][0]
+                                 and first[1] in HEADER_CELLS[mode][1]):
+            header = first
+            rows = rows[1:]
+
+    if mode == 'grammar':
+        # Grammar decks are read by column name
+        if header is None or 'word' not in header or 'answer' not in header:
+            report.add(ERROR, 'schema', f"needs a header with {','.join(columns)}; no row of this deck loads")
+            return columns, None, rows
+        missing = [c for c in columns if c not in header]
+        if missing:
+            report.add(WARNING, 'schema', f"header has no {', '.join(missing)} column")
+        return columns, [header.index(c) if c in header else None for c in columns], rows
+
+    if header is not None and header[:len(columns)] != columns:
+        report.add(WARNING, 'schema', f"header {','.join(header)} read as {','.join(columns)}")
+    return columns, list(range(len(columns))), rows
+
+
+def validate_text(text, path, mode, report=None):
+    """
+    Checks a decoded deck. Returns (report, rows), where rows are the cleaned
+    tuples in the mode's column order: the rows the loader would use, minus
+    exact duplicates.
+    """
+    report = report or FileReport(path, mode)
+    columns, positions, rows = _read_rows(text, mode, report)
+    if positions is None:
+        return report, []
+
+    key_field = columns.index(KEY_FIELDS[mode])
+    meaning_field = columns.index('meaning')
+    required = [n for n, c in enumerate(columns) if c != 'meaning' or mode != 'grammar']
+    cleaned = []
+    seen_rows = set()
+    headwords = set()
+    meanings = set()
+    for line, cells in rows:
+        if len(cells) < len(columns) and mode != 'grammar':
+            report.add(ERROR, 'columns', f"fewer than {len(columns)} columns; the row is skipped", line)
+            continue
+        if len(cells) > len(positions) and any(cells[len(positions):]) and mode != 'grammar':
+            report.add(WARNING, 'columns', "extra columns are ignored (quote cells that contain commas)", line)
+        values = tuple(cells[p] if p is not None and p < len(cells) else '' for p in positions)
+        if any(not values[n] for n in required):
+            report.add(WARNING, 'empty', "empty cell; the row is skipped", line)
+            continue
+        report.rows += 1
+        if values in seen_rows:
+            report.add(WARNING, 'duplicate_row', "same row again; dropped from the normalized copy", line)
+            continue
+        seen_rows.add(values)
+
+        key = normalize_headword(values[key_field])
+        if key in headwords:
+            report.add(WARNING, 'duplicate_headword',
+                       "same headword as an earlier row; it can come up twice in one quiz", line)
+        headwords.add(key)
+        meaning = values[meaning_field]
+        if meaning and mode in CHOICE_MODES:
+            if meaning in meanings:
+                report.add(WARNING, 'duplicate_meaning',
+                           "same meaning as an earlier row; often a copy-paste slip", line)
+            meanings.add(meaning)
+        cleaned.append(values)
+
+    if mode in CHOICE_MODES and report.rows and len(meanings) < NUM_DISTRACTORS + 1:
+        report.add(ERROR, 'few_meanings',
+                   f"only {len(meanings)} distinct meanings; a question needs {NUM_DISTRACTORS + 1} options")
+    if not report.rows and 'schema' not in report.checks:
+        report.add(ERROR, 'no_rows', "no usable rows")
+    report.kept = len(cleaned)
+    return report, cleaned
+
+
+def write_normalized(path, mode, rows):
+    """The deck as UTF-8 (with BOM, for Excel) with a header row and LF line ends."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with atomic_write(path, encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(DEFAULT_COLUMNS[mode])
+        writer.writerows(rows)
+
+
+def validate_file(path, mode, out_path=None):
+    """
+    Validates one deck and, if out_path is given, writes its normalized copy
+    there. Returns the report as a dict (cheap to send back from a worker).
+    """
+    report = FileReport(path, mode)
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except OSError as e:
+        report.add(ERROR, 'read', f"could not read: {e}")
+        return report.to_dict()
+    text = _decode(raw, report)
+    report, rows = validate_text(text, path, mode, report)
+    if out_path is not None and rows:
+        try:
+            write_normalized(out_path, mode, rows)
+        except OSError as e:
+            report.add(ERROR, 'write', f"could not write {out_path}: {e}")
+    return report.to_dict()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from teps_recall.atomic_file import atomic_write
+from teps_recall.catalog import DEFAULT_COLUMNS
+from teps_recall.data_loader import DataLoader
+from teps_recall.validation import ERROR, validate_file
+
+REPORT_FILE = '.validation.json'
+
+
+def _validate(task):
+    path, mode, out_path = task
+    return validate_file(path, mode, out_path)
+
+
+def collect_tasks(loader, data_dir, out_dir):
+    """(path, mode, normalized output path or None) for every deck under data/."""
+    tasks = []
+    for mode in DEFAULT_COLUMNS:
+        for path in loader.get_files(mode):
+            out_path = os.path.join(out_dir, os.path.relpath(path, data_dir)) if out_dir else None
+            tasks.append((path, mode, out_path))
+    return tasks
+
+
+def print_report(report, data_dir):
+    name = os.path.relpath(report['path'], data_dir)
+    levels = [c['level'] for c in report['checks'].values()]
+    mark = '✗' if ERROR in levels else '!'
+    print(f"  {mark} {name} ({report['encoding']}, {report['rows']} rows)")
+    for check, entry in sorted(report['checks'].items(), key=lambda kv: (kv[1]['level'] != ERROR, kv[0])):
+        lines = ''
+        if entry['lines']:
+            more = ', ...' if entry['count'] > len(entry['lines']) else ''
+            lines = ' - line ' + ', '.join(map(str, entry['lines'])) + more
+        print(f"      {entry['level']:<7} {check} x{entry['count']}: {entry['message']}{lines}")
+
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(
+        description="Validate every CSV deck under data/ and optionally write normalized UTF-8 copies.")
+    parser.add_argument('--base-dir', default=base_dir, help="project root containing data/")
+    parser.add_argument('--out', help="write normalized copies here, mirroring data/ (UTF-8, header, no duplicate rows)")
+    parser.add_argument('--report', help=f"JSON report path (default: data/{REPORT_FILE})")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="worker processes (default: all cores)")
+    parser.add_argument('--quiet', action='store_true', help="only print the totals")
+    args = parser.parse_args(argv)
+
+    data_dir = os.path.join(args.base_dir, 'data')
+    out_dir = os.path.abspath(args.out) if args.out else None
+    if out_dir and os.path.commonpath([out_dir, os.path.abspath(data_dir)]) == os.path.abspath(data_dir):
+        parser.error("--out must be outside data/, or the copies would be loaded as decks too")
+    tasks = collect_tasks(DataLoader(args.base_dir, use_compiled=False), data_dir, out_dir)
+
+    t0 = time.perf_counter()
+    if args.jobs > 1 and len(tasks) > 1:
+        # Files are independent; a few chunks per worker keeps the pool busy without per-file IPC
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(tasks) // (args.jobs * 4))
+        with ProcessPoolExecutor(args.jobs) as pool:
+            reports = list(pool.map(_validate, tasks, chunksize=chunksize))
+    else:
+        reports = [_validate(task) for task in tasks]
+    elapsed = time.perf_counter() - t0
+
+    errors = sum(1 for r in reports for c in r['checks'].values() if c['level'] == ERROR)
+    warnings = sum(1 for r in reports for c in r['checks'].values() if c['level'] != ERROR)
+    summary = {
+        'files': len(reports),
+        'rows': sum(r['rows'] for r in reports),
+        'files_with_errors': sum(1 for r in reports if any(c['level'] == ERROR for c in r['checks'].values())),
+        'errors': errors,
+        'warnings': warnings,
+        'seconds': round(elapsed, 3),
+        'jobs': args.jobs,
+        'normalized_dir': out_dir,
+    }
+    report_path = args.report or os.path.join(data_dir, REPORT_FILE)
+    with atomic_write(report_path, encoding='utf-8') as f:
+        json.dump({'summary': summary, 'files': reports}, f, ensure_ascii=False, indent=1)
+
+    if not args.quiet:
+        for report in reports:
+            if report['checks']:
+                print_report(report, data_dir)
+    print(f"\n{summary['files']} files, {summary['rows']} rows: {errors} errors, {warnings} warnings "
+          f"in {elapsed:.2f}s ({args.jobs} jobs). Report: {report_path}")
+    if out_dir:
+        print(f"Normalized copies: {out_dir}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
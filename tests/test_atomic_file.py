@@ -0,0 +1,45 @@
+import json
+import os
+import threading
+
+import pytest
+
+from teps_recall.atomic_file import atomic_write
+
+
+def test_concurrent_writers_never_mix(tmp_path):
+    path = str(tmp_path / 'deck.similar.json')
+    payloads = [{'writer': n, 'entries': [n] * 20000} for n in range(8)]
+    start = threading.Barrier(len(payloads))
+
+    def write(payload):
+        start.wait()
+        for _ in range(5):
+            with atomic_write(path, encoding='utf-8') as f:
+                json.dump(payload, f)
+
+    threads = [threading.Thread(target=write, args=(p,)) for p in payloads]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) in payloads
+    assert os.listdir(tmp_path) == ['deck.similar.json']
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / 'report.json'
+    path.write_text('old', encoding='utf-8')
+    os.chmod(path, 0o640)
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path), encoding='utf-8') as f:
+            f.write('new')
+            raise RuntimeError
+    assert path.read_text(encoding='utf-8') == 'old'
+    assert os.listdir(tmp_path) == ['report.json']
+
+    with atomic_write(str(path), encoding='utf-8') as f:
+        f.write('new')
+    assert path.read_text(encoding='utf-8') == 'new'
+    assert os.stat(path).st_mode & 0o777 == 0o640
@@ -0,0 +1,47 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'src', 'main.py')
+DECKS = ['data/vocabulary/test_1.csv', 'data/vocabulary/test_2.csv', 'data/vocabulary/test_3.csv']
+
+
+def run_batch(tmp_path, lines, *args):
+    sessions = tmp_path / 'sessions.jsonl'
+    sessions.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    proc = subprocess.run([sys.executable, MAIN, '--batch', '--files', DECKS[0],
+                           '--answers', str(sessions), *args],
+                          cwd=ROOT, capture_output=True, text=True, timeout=120)
+    return proc.returncode, [json.loads(line) for line in proc.stdout.splitlines()]
+
+
+def test_bad_field_types_are_per_session_errors(tmp_path):
+    lines = [
+        '{"seed": "x", "answers": [0]}',
+        '{"seed": 3, "answers": [0, 1]}',
+        '{"questions": "3", "answers": [0]}',
+        '{"answers": "abc"}',
+        '5',
+        'not json',
+    ]
+    code, results = run_batch(tmp_path, lines)
+    assert code == 1
+    assert [r['session'] for r in results] == [1, 2, 3, 4, 5, 6]
+    assert ['error' in r for r in results] == [True, False, True, True, True, True]
+    assert results[1]['answered'] == 2
+
+
+def test_replay_does_not_depend_on_jobs(tmp_path):
+    rng = random.Random(1)
+    lines = []
+    # More than one 256-session chunk, so both workers (and their caches) get sessions
+    for n in range(600):
+        files = rng.sample(DECKS, rng.randint(1, 3))
+        lines.append(json.dumps({'seed': n, 'files': files, 'answers': [n % 4] * 8}))
+    code1, serial = run_batch(tmp_path, lines, '--jobs', '1')
+    code2, parallel = run_batch(tmp_path, lines, '--jobs', '2')
+    assert code1 == code2 == 0
+    assert serial == parallel
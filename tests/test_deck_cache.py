@@ -0,0 +1,52 @@
+import csv
+import os
+
+from teps_recall.data_loader import DataLoader, DeckCache
+from teps_recall.similarity_index import similar_path
+
+
+def write_deck(tmp_path, rows=500):
+    path = tmp_path / 'data' / 'vocabulary' / 'big.csv'
+    path.parent.mkdir(parents=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['word', 'meaning'])
+        for i in range(rows):
+            writer.writerow([f'word{i}', f'{"가나다라마바사"[i % 7]}{"아자차카타파하"[i // 7 % 7]}{i}하다'])
+    return str(path)
+
+
+def test_similarity_indexes_count_against_the_cap(tmp_path):
+    path = write_deck(tmp_path)
+    cache = DeckCache()
+    loader = DataLoader(str(tmp_path), cache=cache, use_compiled=False)
+    loader.load_vocabulary(path)
+    deck_bytes = cache.stats()['bytes']
+    loader.get_similarity_index(path)
+    index_bytes = cache.stats()['bytes'] - deck_bytes
+    # Python objects take more room than the JSON they came from
+    assert index_bytes > os.path.getsize(similar_path(path))
+
+    # A cap below the index's size keeps only the most recent entry
+    small = DeckCache(max_bytes=index_bytes // 2)
+    loader = DataLoader(str(tmp_path), cache=small, use_compiled=False)
+    loader.load_vocabulary(path)
+    loader.get_similarity_index(path)
+    assert small.stats()['entries'] == 1
+
+
+def test_deck_id_is_stable_across_edits_and_order(tmp_path):
+    path = write_deck(tmp_path, rows=10)
+    other = str(tmp_path / 'data' / 'vocabulary' / 'other.csv')
+    with open(other, 'w', encoding='utf-8') as f:
+        f.write('word,meaning\nabate,줄다\n')
+    loader = DataLoader(str(tmp_path), use_compiled=False)
+    assert loader.deck_id('vocabulary', [path]) == 'vocabulary/big.csv'
+
+    both = loader.deck_id('vocabulary', [path, other])
+    assert both.startswith('vocabulary/selection-')
+    assert loader.deck_id('vocabulary', [other, path]) == both
+    with open(other, 'a', encoding='utf-8') as f:
+        f.write('abide,머무르다\n')
+    assert loader.deck_id('vocabulary', [path, other]) == both
+    assert both != loader.deck_id('vocabulary', [path])
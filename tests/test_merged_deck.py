@@ -0,0 +1,53 @@
+import csv
+
+import pytest
+
+from teps_recall import merged_deck
+from teps_recall.data_loader import DataLoader
+
+
+@pytest.fixture
+def decks(tmp_path):
+    """Three vocabulary decks sharing some headwords with different meanings."""
+    paths = []
+    for d in range(3):
+        path = tmp_path / 'data' / 'vocabulary' / f'test_{d + 1}.csv'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['word', 'meaning'])
+            for i in range(20):
+                # Every third word appears in each deck, with that deck's meaning
+                word = f'shared{i}' if i % 3 == 0 else f'word{d}_{i}'
+                writer.writerow([word, f'뜻{d}_{i}'])
+        paths.append(str(path))
+    merged_deck._merged.clear()
+    yield DataLoader(str(tmp_path), use_compiled=False), paths
+    merged_deck._merged.clear()
+
+
+def rows(deck):
+    return [(row['word'], row['meaning']) for row in deck]
+
+
+def test_cached_subset_merge_matches_fresh_merge(decks):
+    loader, (one, two, three) = decks
+    fresh = rows(loader.load_decks('vocabulary', [one, two, three]))
+
+    merged_deck._merged.clear()
+    loader.load_decks('vocabulary', [one, three])
+    assert rows(loader.load_decks('vocabulary', [one, two, three])) == fresh
+
+    merged_deck._merged.clear()
+    loader.load_decks('vocabulary', [two, three])
+    assert rows(loader.load_decks('vocabulary', [three, one, two])) == fresh
+
+
+def test_selection_order_does_not_matter(decks):
+    loader, (one, two, three) = decks
+    fresh = rows(loader.load_decks('vocabulary', [one, two, three]))
+    merged_deck._merged.clear()
+    assert rows(loader.load_decks('vocabulary', [three, two, one])) == fresh
+    # The first file in path order wins a duplicate headword
+    assert ('shared0', '뜻0_0') in fresh
+    assert len(fresh) == 20 + 2 * 13
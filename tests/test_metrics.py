@@ -0,0 +1,28 @@
+import threading
+
+from teps_recall.metrics import SlowRerunProfiler
+
+
+def test_overlapping_reruns_are_not_profiled_twice(tmp_path):
+    profiler = SlowRerunProfiler(0, str(tmp_path))
+    inside = threading.Event()
+    release = threading.Event()
+
+    def slow_rerun():
+        with profiler.profile('quiz'):
+            inside.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=slow_rerun)
+    thread.start()
+    inside.wait(5)
+    ran = []
+    with profiler.profile('home'): # would raise on 3.12+ without the guard
+        ran.append(True)
+    release.set()
+    thread.join()
+
+    assert ran == [True]
+    assert profiler.skipped == 1
+    assert profiler.dumped == 1
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,28 @@
+import sqlite3
+
+from teps_recall.progress_store import ProgressStore
+
+
+def test_deferred_calls_run_on_the_writer_in_order(tmp_path):
+    path = str(tmp_path / 'progress.sqlite3')
+    store = ProgressStore(path, batch_size=100, flush_interval=60)
+    calls = []
+    store.record('kim', 'vocabulary', 'abate', True)
+    store.defer(calls.append, 'abate')
+    store.defer(calls.append, 'abide')
+    assert calls == [] # nothing runs on the caller's thread
+    store.close()
+
+    assert calls == ['abate', 'abide']
+    rows = sqlite3.connect(path).execute("SELECT user_id, item, correct FROM answers").fetchall()
+    assert rows == [('kim', 'abate', 1)]
+
+
+def test_failing_deferred_call_does_not_stop_the_writer(tmp_path):
+    store = ProgressStore(str(tmp_path / 'progress.sqlite3'), batch_size=1)
+    calls = []
+    store.defer(lambda: 1 / 0)
+    store.defer(calls.append, 'after')
+    store.flush()
+    assert calls == ['after']
+    store.close()
@@ -0,0 +1,72 @@
+import csv
+from itertools import combinations
+
+from teps_recall import merged_deck
+from teps_recall.data_loader import DataLoader
+from teps_recall.quiz_manager import VocabularyQuiz
+from teps_recall.similarity_index import SimilarityLookup
+
+DECK = [{'word': f'word{i}', 'meaning': f'뜻{i}'} for i in range(30)]
+SEEDS = range(20000)
+ASKED = 10
+
+
+def asked_items(seed):
+    quiz = VocabularyQuiz(DECK)
+    quiz.prepare_quiz(ASKED, seed=seed, lazy=True)
+    return [quiz.questions.order[i] for i in range(ASKED)]
+
+
+def chi_square(counts, expected):
+    return sum((c - expected) ** 2 / expected for c in counts)
+
+
+def test_same_seed_same_quiz():
+    a, b = VocabularyQuiz(DECK), VocabularyQuiz(DECK)
+    a.prepare_quiz(ASKED, seed=7)
+    b.prepare_quiz(ASKED, seed=7)
+    assert [(q.text, q.options) for q in a.questions] == [(q.text, q.options) for q in b.questions]
+
+
+def test_items_are_picked_uniformly():
+    items = [0] * len(DECK)
+    pairs = {}
+    for seed in SEEDS:
+        picked = asked_items(seed)
+        assert len(set(picked)) == ASKED
+        for i in picked:
+            items[i] += 1
+        for pair in combinations(sorted(picked), 2):
+            pairs[pair] = pairs.get(pair, 0) + 1
+
+    # 29 degrees of freedom: p = 0.001 at 58.3
+    assert chi_square(items, len(SEEDS) * ASKED / len(DECK)) < 58.3
+    # Each pair is asked together with probability (10*9) / (30*29)
+    expected = len(SEEDS) * ASKED * (ASKED - 1) / (len(DECK) * (len(DECK) - 1))
+    assert len(pairs) == len(DECK) * (len(DECK) - 1) // 2
+    assert all(abs(n - expected) < 0.12 * expected for n in pairs.values())
+
+
+def test_hard_distractors_from_decks_sharing_glosses_are_distinct(tmp_path):
+    # Both decks gloss different words with the same family of meanings,
+    # so each deck's index lists the same neighbours
+    paths = []
+    for d in range(2):
+        path = tmp_path / 'data' / 'vocabulary' / f'test_{d + 1}.csv'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['word', 'meaning'])
+            for i in range(12):
+                writer.writerow([f'deck{d}_word{i}', f'조심스럽게 {"가나다라"[i % 4]}{i % 6}하다'])
+        paths.append(str(path))
+    merged_deck._merged.clear()
+    loader = DataLoader(str(tmp_path), use_compiled=False)
+    deck = loader.load_decks('vocabulary', paths)
+    similarity = SimilarityLookup(loader.get_similarity_index(p) for p in paths)
+
+    for seed in range(300):
+        quiz = VocabularyQuiz(deck, similarity)
+        quiz.prepare_quiz(len(deck), seed=seed, lazy=True)
+        for q in quiz.questions:
+            assert len(set(q.options)) == len(q.options) == 4
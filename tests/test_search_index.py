@@ -0,0 +1,55 @@
+import csv
+import os
+import pickle
+
+from teps_recall import search_index
+from teps_recall.data_loader import DataLoader
+
+
+class Exploit:
+    def __reduce__(self):
+        return (open, (os.devnull + '-should-not-exist', 'w'))
+
+
+def make_loader(tmp_path):
+    deck = tmp_path / 'data' / 'vocabulary' / 'test_1.csv'
+    deck.parent.mkdir(parents=True)
+    with open(deck, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['word', 'meaning'])
+        writer.writerows([['abstract', '요약하다'], ['absolve', '용서하다'], ['boast', '자랑하다']])
+    search_index._indexes.clear()
+    return DataLoader(str(tmp_path), use_compiled=False)
+
+
+def hits(result):
+    return [hit['word'] for hit in result['hits']]
+
+
+def test_segments_round_trip_through_disk(tmp_path):
+    loader = make_loader(tmp_path)
+    expected = {q: hits(loader.search(q)) for q in ('abs', '요야', 'ㅈㄹ', 'boast')}
+    assert sorted(expected['abs']) == ['absolve', 'abstract']
+    assert expected['요야'] == ['abstract'] and expected['ㅈㄹ'] == ['boast']
+
+    search_index._indexes.clear()
+    index = search_index.get_search_index(str(tmp_path / 'data'))
+    assert len(index.segments) == 1
+    assert {q: hits(loader.search(q)) for q in expected} == expected
+
+
+def test_only_valid_segment_files_are_loaded(tmp_path):
+    loader = make_loader(tmp_path)
+    loader.search('abs')
+    search_dir = tmp_path / 'data' / search_index.SEARCH_DIR
+    (segment_file,) = search_dir.iterdir()
+    raw = segment_file.read_bytes()
+    (search_dir / 'old.pickle').write_bytes(pickle.dumps((1, Exploit())))
+    (search_dir / 'cut.seg').write_bytes(raw[:-3])
+    (search_dir / 'junk.seg').write_bytes(b'\x80\x04junk')
+
+    search_index._indexes.clear()
+    index = search_index.get_search_index(str(tmp_path / 'data'))
+    assert list(index.segments) == ['vocabulary/test_1.csv']
+    assert not os.path.exists(os.devnull + '-should-not-exist')
+    assert not (search_dir / 'old.pickle').exists()